@@ -88,10 +88,14 @@ class AdapterEvents:
     @inlineCallbacks
     def send_event(self, event_header, event_body):
         """
-        Send the event to the event bus
+        Submit the event to the event bus.  Device events (alarms) are sent
+        at once; other events are queued by the core proxy and sent with the
+        next batch.
 
         :param event_header: (dict) Event specific context data
         :param event_body: (dict) Common Event information dictionary
+        :return: (Deferred) fires once a device event is sent, or once any
+                 other event is queued
         """
         event = None
         try:
@@ -107,12 +111,13 @@ class AdapterEvents:
                event = Event(header=event_header, config_event=event_body)
 
             if event is not None:
-               yield self.core_proxy.submit_event(event)
+               immediate = event_header.type == EventType.DEVICE_EVENT
+               yield self.core_proxy.submit_event(event, immediate=immediate)
 
         except Exception as e:
             self.log.exception('failed-to-send-event', e=e)
             raise
-        log.debug('event-sent-to-kafka', event_type=event_header.type)
+        log.debug('event-submitted', event_type=event_header.type)
 
 
 
@@ -389,7 +389,7 @@ class OnuPmIntervalMetrics(AdapterPmMetrics):
                                           ts=now.float_timestamp,
                                           slice_data=slice_data)
 
-                    self.log.debug('Sending-onu-metrics-to-kafka')
+                    self.log.debug('submitting-onu-metrics')
                     yield self.event_mgr.send_event(event_header, event_body)
 
         except Exception as e:
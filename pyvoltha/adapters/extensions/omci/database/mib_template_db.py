@@ -17,6 +17,8 @@ from __future__ import absolute_import
 from twisted.internet.defer import inlineCallbacks, returnValue
 from .mib_db_api import CREATED_KEY, MODIFIED_KEY
 import json
+import time
+from collections import OrderedDict
 from datetime import datetime
 import structlog
 from pyvoltha.common.utils.registry import registry
@@ -28,6 +30,11 @@ class MibTemplateDb(object):
 
     BASE_PATH = 'service/voltha/omci_mibs/templates'
     TEMPLATE_PATH = '{}/{}/{}'
+    TEMPLATE_CACHE_SIZE = 128
+    TEMPLATE_CACHE_TTL = 300            # Seconds before a cached template is read again
+
+    # Template path -> (raw template JSON, time read), shared by all ONUs of the same type
+    _template_cache = OrderedDict()
 
     def __init__(self, vendor_id, equipment_id, software_version, serial_number, mac_address):
         self.log = structlog.get_logger()
@@ -43,8 +50,7 @@ class MibTemplateDb(object):
         self._mac_address = mac_address
 
         self.args = registry('main').get_args()
-        host, port = self.args.etcd.split(':', 1)
-        self._kv_store = TwistedEtcdStore(host, port, MibTemplateDb.BASE_PATH)
+        self._kv_store = None           # Created on a cache miss
         self.loaded = False
 
     def get_template_instance(self):
@@ -73,11 +79,36 @@ class MibTemplateDb(object):
     @inlineCallbacks
     def load_template(self):
         path = self._get_template_path()
+        cache = MibTemplateDb._template_cache
+
+        now = time.time()
+
+        cached = cache.get(path)
+        if cached is not None:
+            results, read_time = cached
+            if now - read_time < MibTemplateDb.TEMPLATE_CACHE_TTL:
+                cache.move_to_end(path)
+                self._jsonstring = results
+                self.log.debug('found-cached-template-data', path=path)
+                self.loaded = True
+                returnValue(True)
+
+            del cache[path]     # Read it again in case it was updated
+
+        if self._kv_store is None:
+            host, port = self.args.etcd.split(':', 1)
+            self._kv_store = TwistedEtcdStore(host, port, MibTemplateDb.BASE_PATH)
+
         results = yield self._kv_store.get(path)
         if results:
             self._jsonstring = results
             self.log.debug('found-template-data', path=path)
             self.loaded = True
+
+            cache[path] = (results, now)
+            if len(cache) > MibTemplateDb.TEMPLATE_CACHE_SIZE:
+                cache.popitem(last=False)
+
             returnValue(True)
         else:
             self.log.warn('no-template-found', path=path)
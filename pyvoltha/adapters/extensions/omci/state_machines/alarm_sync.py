@@ -14,11 +14,13 @@
 # limitations under the License.
 #
 from __future__ import absolute_import
+import functools
 import structlog
 import arrow
 from datetime import datetime
 from transitions import Machine
 from twisted.internet import reactor
+from twisted.internet.error import AlreadyCalled, AlreadyCancelled
 from pyvoltha.adapters.extensions.omci.omci_defs import ReasonCodes, EntityOperations
 from pyvoltha.adapters.extensions.omci.omci_cc import OmciCCRxEvents, OMCI_CC, RX_RESPONSE_KEY
 from pyvoltha.adapters.extensions.omci.omci_messages import OmciGetAllAlarmsResponse
@@ -29,14 +31,44 @@ from pyvoltha.adapters.extensions.omci.omci_entities import CircuitPack, PptpEth
 
 from pyvoltha.common.event_bus import EventBusClient
 from voltha_protos.omci_alarm_db_pb2 import AlarmOpenOmciEventType
-import six
-from six.moves import range
 
 RxEvent = OmciCCRxEvents
 RC = ReasonCodes
 OP = EntityOperations
 
 
+# Slots of the per-event OMCI-CC subscription entries
+_SUB_SUBSCRIPTION = 0
+_SUB_CALLBACK = 1
+_SUB_TOPIC = 2
+
+_ALARM_BITMAP_BITS = 224
+_ALARM_BITMAP_MASK = (1 << _ALARM_BITMAP_BITS) - 1
+
+try:
+    _bit_count = int.bit_count          # Python 3.10+
+except AttributeError:
+    def _bit_count(value):
+        return bin(value).count('1')
+
+
+def _alarm_numbers(mask):
+    """
+    Generate the alarm numbers, in ascending order, for the bits set in an
+    alarm bitmap. Alarm number 0 is the most significant bit of the bitmap.
+    """
+    while mask:
+        bit = mask.bit_length() - 1
+        yield _ALARM_BITMAP_BITS - 1 - bit
+        mask ^= 1 << bit
+
+
+@functools.lru_cache(maxsize=512)
+def _camel_case(description):
+    # For CamelCase, replace hyphens with spaces before camel casing the string
+    return description.replace('-', ' ').title().replace(' ', '')
+
+
 class AlarmSynchronizer(object):
     """
     OpenOMCI Alarm Synchronizer state machine
@@ -109,13 +141,10 @@ class AlarmSynchronizer(object):
         self._device_in_db = False
 
         self._event_bus = EventBusClient()
-        self._omci_cc_subscriptions = {               # RxEvent.enum -> Subscription Object
-            RxEvent.Get_ALARM_Get: None,
-            RxEvent.Alarm_Notification: None
-        }
-        self._omci_cc_sub_mapping = {
-            RxEvent.Get_ALARM_Get: self.on_alarm_update_response,
-            RxEvent.Alarm_Notification: self.on_alarm_notification
+        # RxEvent.enum -> [Subscription Object, callback, event bus topic]
+        self._omci_cc_subs = {
+            RxEvent.Get_ALARM_Get: [None, self.on_alarm_update_response, None],
+            RxEvent.Alarm_Notification: [None, self.on_alarm_notification, None]
         }
 
         # Statistics and attributes
@@ -137,7 +166,7 @@ class AlarmSynchronizer(object):
             try:
                 if d is not None and not d.called:
                     d.cancel()
-            except:
+            except (AlreadyCalled, AlreadyCancelled):
                 pass
 
     def __str__(self):
@@ -221,9 +250,9 @@ class AlarmSynchronizer(object):
             task.stop()
 
         # Drop Response and Autonomous notification subscriptions
-        for event, sub in six.iteritems(self._omci_cc_subscriptions):
+        for entry in self._omci_cc_subs.values():
+            sub, entry[_SUB_SUBSCRIPTION] = entry[_SUB_SUBSCRIPTION], None
             if sub is not None:
-                self._omci_cc_subscriptions[event] = None
                 self._device.omci_cc.event_bus.unsubscribe(sub)
 
     def _seed_database(self):
@@ -235,7 +264,7 @@ class AlarmSynchronizer(object):
                     self.log.debug('seed-db-does-not-exist', device_id=self._device_id)
 
                 except KeyError:
-                    # Device already is in database
+                    # Device already is in database (see AlarmDbExternal.add)
                     self.log.debug('seed-db-exist', device_id=self._device_id)
 
                 self._device_in_db = True
@@ -255,12 +284,15 @@ class AlarmSynchronizer(object):
 
         # Set up Response and Autonomous notification subscriptions
         try:
-            for event, sub in six.iteritems(self._omci_cc_sub_mapping):
-                if self._omci_cc_subscriptions[event] is None:
-                    self._omci_cc_subscriptions[event] = \
+            for event, entry in self._omci_cc_subs.items():
+                if entry[_SUB_SUBSCRIPTION] is None:
+                    if entry[_SUB_TOPIC] is None:
+                        entry[_SUB_TOPIC] = OMCI_CC.event_bus_topic(self._device_id, event)
+
+                    entry[_SUB_SUBSCRIPTION] = \
                         self._device.omci_cc.event_bus.subscribe(
-                            topic=OMCI_CC.event_bus_topic(self._device_id, event),
-                            callback=sub)
+                            topic=entry[_SUB_TOPIC],
+                            callback=entry[_SUB_CALLBACK])
 
         except Exception as e:
             self.log.exception('omci-cc-subscription-setup', e=e)
@@ -332,7 +364,7 @@ class AlarmSynchronizer(object):
             self.process_onu_only_diffs(onu_only, onu_db)
 
         if olt_only is not None:
-            self.process_olt_only_diffs(olt_only)
+            self.process_olt_only_diffs(olt_only, olt_db)
 
         if attr_diffs is not None:
             self.process_attr_diffs(attr_diffs, olt_db, onu_db)
@@ -346,47 +378,65 @@ class AlarmSynchronizer(object):
         :param onu_only: (list) Tuples with [0]=class ID, [1]=entity ID
         :param onu_db: (dict) ONU Alarm database from the alarm audit upload
         """
+        attrs_key = ATTRIBUTES_KEY
+        bitmap_key = AlarmDbExternal.ALARM_BITMAP_KEY
+
         for cid_eid in onu_only:
             class_id = cid_eid[0]
             entity_id = cid_eid[1]
             try:
-                bitmap = onu_db[class_id][entity_id][ATTRIBUTES_KEY][AlarmDbExternal.ALARM_BITMAP_KEY]
-                self.process_alarm_data(class_id, entity_id, bitmap, -1)
+                bitmap = onu_db[class_id][entity_id][attrs_key][bitmap_key]
+                self.process_alarm_data(class_id, entity_id, bitmap, -1, prev_bitmap=0)
 
             except KeyError as e:
                 self.log.error('alarm-not-found', class_id=class_id, entity_id=entity_id, e=e)
 
-    def process_olt_only_diffs(self, olt_only):
+    def process_olt_only_diffs(self, olt_only, olt_db):
         """
         OLT only alarms may occur if the alarm(s) are no longer active on the ONU
         and the notification was missed. Process this by sending a cleared bitmap
         for any alarm in the OLT database only
 
         :param olt_only: (list) Tuples with [0]=class ID, [1]=entity ID
+        :param olt_db: (dict) OLT Alarm database snapshot from the alarm audit
         """
+        attrs_key = ATTRIBUTES_KEY
+        bitmap_key = AlarmDbExternal.ALARM_BITMAP_KEY
+
         for cid_eid in olt_only:
+            olt_bitmap = olt_db.get(cid_eid[0], {}).get(cid_eid[1], {}).get(attrs_key, {}).get(bitmap_key)
+
             # First process the alarm clearing
-            self.process_alarm_data(cid_eid[0], cid_eid[1], 0, -1)
+            self.process_alarm_data(cid_eid[0], cid_eid[1], 0, -1, prev_bitmap=olt_bitmap)
             # Now remove from alarm DB so we match the ONU alarm table
             self._database.delete(self._device_id, cid_eid[0], cid_eid[1])
 
-    def process_attr_diffs(self, attr_diffs, onu_db):
+    def process_attr_diffs(self, attr_diffs, olt_db, onu_db):
         """
         Mismatch in alarm settings. Note that the attribute should always be the
-        alarm bitmap attribute (long).  For differences, the ONU is always right
+        alarm bitmap attribute (long).  For differences, the ONU is always right.
+        Entries where the OLT snapshot already matches the ONU bitmap are skipped.
 
         :param attr_diffs: (list(int,int,str)) [0]=class ID, [1]=entity ID, [1]=attr
         :param olt_db: (dict) OLT Alarm database snapshot from the alarm audit
         :param onu_db: (dict) ONU Alarm database from the alarm audit upload
         """
+        attrs_key = ATTRIBUTES_KEY
+        bitmap_key = AlarmDbExternal.ALARM_BITMAP_KEY
+
         for cid_eid_attr in attr_diffs:
             class_id = cid_eid_attr[0]
             entity_id = cid_eid_attr[1]
 
             try:
-                assert AlarmDbExternal.ALARM_BITMAP_KEY == cid_eid_attr[2]
-                bitmap = onu_db[class_id][entity_id][ATTRIBUTES_KEY][AlarmDbExternal.ALARM_BITMAP_KEY]
-                self.process_alarm_data(class_id, entity_id, bitmap, -1)
+                assert bitmap_key == cid_eid_attr[2]
+                bitmap = onu_db[class_id][entity_id][attrs_key][bitmap_key]
+                olt_bitmap = olt_db.get(class_id, {}).get(entity_id, {}).get(attrs_key, {}).get(bitmap_key)
+
+                if olt_bitmap == bitmap:
+                    continue
+
+                self.process_alarm_data(class_id, entity_id, bitmap, -1, prev_bitmap=olt_bitmap)
 
             except KeyError as e:
                 self.log.error('alarm-not-found', class_id=class_id, entity_id=entity_id, e=e)
@@ -400,7 +450,7 @@ class AlarmSynchronizer(object):
         """
         self.log.debug('on-alarm-update-response', state=self.state, msg=msg)
 
-        if self._omci_cc_subscriptions[RxEvent.Get_ALARM_Get]:
+        if self._omci_cc_subs[RxEvent.Get_ALARM_Get][_SUB_SUBSCRIPTION]:
             if self.state == 'disabled':
                 self.log.error('rx-in-invalid-state', state=self.state)
                 return
@@ -431,23 +481,21 @@ class AlarmSynchronizer(object):
 
         alarm_msg = msg.get(RX_RESPONSE_KEY)
         if alarm_msg is not None:
-            omci_msg = alarm_msg.fields['omci_message'].fields
-            class_id = omci_msg['entity_class']
-            seq_no = omci_msg['alarm_sequence_number']
+            omci_fields = alarm_msg.fields['omci_message'].fields
+            class_id = omci_fields['entity_class']
 
             # Validate that this ME supports alarm notifications
-            if class_id not in self._device.me_map or \
-                    OP.AlarmNotification not in self._device.me_map[class_id].notifications or \
-                    len(self._device.me_map[class_id].alarms) == 0:
+            me = self._device.me_map.get(class_id)
+            if me is None or OP.AlarmNotification not in me.notifications or not me.alarms:
                 self.log.warn('invalid-alarm-notification', class_id=class_id)
                 return
 
             self.process_alarm_data(class_id,
-                                    omci_msg['entity_id'],
-                                    omci_msg['alarm_bit_map'],
-                                    seq_no)
+                                    omci_fields['entity_id'],
+                                    omci_fields['alarm_bit_map'],
+                                    omci_fields['alarm_sequence_number'])
 
-    def process_alarm_data(self, class_id, entity_id, bitmap, msg_seq_no):
+    def process_alarm_data(self, class_id, entity_id, bitmap, msg_seq_no, prev_bitmap=None):
         """
         Process new alarm data
 
@@ -455,6 +503,8 @@ class AlarmSynchronizer(object):
         :param entity_id: (int) Entity ID of alarm
         :param bitmap: (long) Alarm bitmap value
         :param msg_seq_no: (int) Alarm sequence number. -1 if generated during an audit
+        :param prev_bitmap: (long) Previous alarm bitmap value if already known by the
+                                   caller. If None, the alarm database is queried
         """
         self.log.debug('process-alarm-data', class_id=class_id, entity_id=entity_id, bitmap=hex(bitmap), msg_seq_no=msg_seq_no)
         if msg_seq_no > 0:
@@ -466,13 +516,14 @@ class AlarmSynchronizer(object):
                 self._deferred = reactor.callLater(0, self.audit_alarm)
 
         key = AlarmDbExternal.ALARM_BITMAP_KEY
-        prev_entry = self._database.query(self._device_id, class_id, entity_id)
-        try:
-            # Need to access the bit map structure which is nested in dict attributes
-            prev_bitmap = 0 if len(prev_entry) == 0 else int(prev_entry['attributes'][key])
-        except Exception as e:
-            self.log.exception('alarm-prev-entry-collection-failure', class_id=class_id,
-                               device_id=self._device_id, entity_id=entity_id, value=bitmap, e=e)
+        if prev_bitmap is None:
+            prev_entry = self._database.query(self._device_id, class_id, entity_id)
+            try:
+                # Need to access the bit map structure which is nested in dict attributes
+                prev_bitmap = 0 if len(prev_entry) == 0 else int(prev_entry['attributes'][key])
+            except Exception as e:
+                self.log.exception('alarm-prev-entry-collection-failure', class_id=class_id,
+                                   device_id=self._device_id, entity_id=entity_id, value=bitmap, e=e)
         # Save current entry before going on
         try:
             self._database.set(self._device_id, class_id, entity_id, {key: bitmap})
@@ -482,39 +533,35 @@ class AlarmSynchronizer(object):
                                device_id=self._device_id, entity_id=entity_id, value=bitmap, e=e)
 
         if self._alarm_manager is not None:
-            # Generate a set of alarm number that are raised in current and previous
-            previously_raised = {alarm_no for alarm_no in range(224)
-                                 if prev_bitmap & (1 << (223-alarm_no)) != 0}
+            # Alarm bits that changed state. Bit 223 (MSB) is alarm number 0
+            changed = (prev_bitmap ^ bitmap) & _ALARM_BITMAP_MASK
+            newly_cleared = prev_bitmap & changed
+            newly_raised = bitmap & changed
 
-            currently_raised = {alarm_no for alarm_no in range(224)
-                                if bitmap & (1 << (223-alarm_no)) != 0}
-
-            newly_cleared = previously_raised - currently_raised
-            newly_raised = currently_raised - previously_raised
             self.log.debug('compare-bitmap', class_id=class_id, prev_bitmap=hex(prev_bitmap), bitmap=hex(bitmap),
-                            previously_raised=previously_raised, currently_raised=currently_raised,
-                            newly_cleared=newly_cleared, newly_raised=newly_raised)
+                        newly_cleared=hex(newly_cleared), newly_raised=hex(newly_raised),
+                        cleared_count=_bit_count(newly_cleared), raised_count=_bit_count(newly_raised))
 
             # Generate the set/clear alarms now
-            for alarm_number in newly_cleared:
+            for alarm_number in _alarm_numbers(newly_cleared):
                 reactor.callLater(0, self.clear_alarm, class_id, entity_id, alarm_number)
 
-            for alarm_number in newly_raised:
+            for alarm_number in _alarm_numbers(newly_raised):
                 reactor.callLater(0, self.raise_alarm, class_id, entity_id, alarm_number)
 
     def get_alarm_description(self, class_id, alarm_number):
         """
         Get the alarm description, both as a printable-string and also a CamelCase value
         """
-        if alarm_number in self._device.me_map[class_id].alarms:
-            description = self._device.me_map[class_id].alarms[alarm_number]
-        elif alarm_number <= 207:
-            description = 'Reserved alarm {}'.format(alarm_number)
-        else:
-            description = 'Vendor specific alarm {}'.format(alarm_number)
+        description = self._device.me_map[class_id].alarms.get(alarm_number)
 
-        # For CamelCase, replace hyphens with spaces before camel casing the string
-        return description, description.replace('-', ' ').title().replace(' ', '')
+        if description is None:
+            if alarm_number <= 207:
+                description = 'Reserved alarm {}'.format(alarm_number)
+            else:
+                description = 'Vendor specific alarm {}'.format(alarm_number)
+
+        return description, _camel_case(description)
 
     def raise_alarm(self, class_id, entity_id, alarm_number):
         """
@@ -527,7 +574,7 @@ class AlarmSynchronizer(object):
         description, name = self.get_alarm_description(class_id, alarm_number)
 
         self.log.warn('alarm-set', class_id=class_id, entity_id=entity_id,
-                      alarm_number=alarm_number, name=name, description=description)
+                   alarm_number=alarm_number, name=name, description=description)
 
         if self._alarm_manager is not None:
             alarm = self.omci_alarm_to_onu_alarm(class_id, entity_id, alarm_number)
@@ -14,14 +14,25 @@
 # limitations under the License.
 #
 from __future__ import absolute_import
+from collections import namedtuple, OrderedDict
 from .task import Task
-from twisted.internet.defer import inlineCallbacks, TimeoutError, failure, AlreadyCalledError, returnValue
-from twisted.internet import reactor
+from twisted.internet.defer import inlineCallbacks, TimeoutError, failure, AlreadyCalledError, returnValue, \
+    DeferredList, FirstError, CancelledError
 from pyvoltha.adapters.extensions.omci.omci_defs import ReasonCodes
 from pyvoltha.adapters.extensions.omci.omci_me import OntGFrame, Ont2GFrame, SoftwareImageFrame, IpHostConfigDataFrame
 from pyvoltha.adapters.extensions.omci.database.mib_template_db import MibTemplateDb
 
 RC = ReasonCodes
+RC_SUCCESS = RC.Success.value
+
+
+def _ascii(value):
+    """Decode a NUL padded OMCI string attribute"""
+    return value.rstrip(b'\x00').decode('ascii')
+
+
+# Identifying attributes of an ONU from its last template lookup
+_OnuIdentity = namedtuple('_OnuIdentity', ['equipment_id', 'software_version', 'mac_address'])
 
 
 class MibTemplateTask(Task):
@@ -37,6 +48,10 @@ class MibTemplateTask(Task):
     """
     task_priority = 250
     name = "MIB Template Task"
+    ONU_IDENTITY_CACHE_SIZE = 1024
+
+    # ONU Serial Number -> _OnuIdentity, of the most recently identified ONUs
+    _onu_identity_cache = OrderedDict()
 
     def __init__(self, omci_agent, device_id):
         """
@@ -67,7 +82,7 @@ class MibTemplateTask(Task):
         Start MIB Template tasks
         """
         super(MibTemplateTask, self).start()
-        self._local_deferred = reactor.callLater(0, self.create_template_instance)
+        self._local_deferred = self.create_template_instance()
 
     def stop(self):
         """
@@ -92,56 +107,82 @@ class MibTemplateTask(Task):
             results = yield self._device.omci_cc.send_mib_reset()
 
             status = results.fields['omci_message'].fields['success_code']
-            if status != ReasonCodes.Success.value:
+            if status != RC_SUCCESS:
                 raise Exception('MIB Reset request failed with status code: {}'.format(status))
 
             self.log.debug('gather-onu-info')
 
-            # Query for Vendor ID, Equipment ID and Software Version
-            results = yield self._get_omci(OntGFrame(attributes=['vendor_id', 'serial_number']))
-            self.log.debug('got-ontg', results=results)
-
-            vendor_id = results.get('vendor_id', b'').decode('ascii').rstrip('\x00')
-            serial_number = results.get('serial_number', '')
+            # Query for Vendor ID, Serial Number and Software Version. The requests are
+            # independent so queue them all before waiting on any reply. Only two
+            # software slots are checked for the active version.
+            ontg, results1, results2 = yield self._get_omci_list([
+                OntGFrame(attributes=['vendor_id', 'serial_number']),
+                SoftwareImageFrame(0, attributes=['is_active', 'version']),
+                SoftwareImageFrame(1, attributes=['is_active', 'version'])
+            ])
+            self.log.debug('got-onu-info', ontg=ontg, results1=results1, results2=results2)
 
-            results = yield self._get_omci(Ont2GFrame(attributes='equipment_id'))
-            self.log.debug('got-ont2g', results=results)
-
-            equipment_id = results.get('equipment_id', b'').decode('ascii').rstrip('\x00')
-
-            # check only two software slots for active version.
-            results1 = yield self._get_omci(SoftwareImageFrame(0, attributes=['is_active', 'version']))
-            results2 = yield self._get_omci(SoftwareImageFrame(1, attributes=['is_active', 'version']))
-            self.log.debug('got-software', results1=results1, results2=results2)
+            vendor_id = _ascii(ontg.get('vendor_id', b''))
+            serial_number = ontg.get('serial_number', '')
 
             software_version = ''
             if results1.get('is_active') == 1:
-                software_version = results1.get('version', b'').decode('ascii').rstrip('\x00')
+                software_version = _ascii(results1.get('version', b''))
             elif results2.get('is_active') == 1:
-                software_version = results2.get('version', b'').decode('ascii').rstrip('\x00')
-
-            results = yield self._get_omci(IpHostConfigDataFrame(1, attributes='mac_address'))
-            self.log.debug('got-ip-host-config', results=results)
+                software_version = _ascii(results2.get('version', b''))
 
-            mac_address = results.get('mac_address', '')
+            # No template can match without these, so skip the remaining requests
+            if not vendor_id or not software_version:
+                self.log.info('no-usable-template-lookup-data', vendor_id=vendor_id,
+                              software_version=software_version)
+                self.deferred.callback(None)
+                return
+
+            # Equipment ID and MAC Address are fixed for a given ONU, so reuse them if this
+            # ONU was already identified while running the same software version
+            cache = MibTemplateTask._onu_identity_cache
+            cached = cache.get(serial_number)
+
+            if cached is not None and cached.software_version == software_version:
+                self.log.debug('onu-identity-cache-hit', serial_number=serial_number)
+                cache.move_to_end(serial_number)
+                equipment_id = cached.equipment_id
+                mac_address = cached.mac_address
+            else:
+                ont2g, ip_host = yield self._get_omci_list([
+                    Ont2GFrame(attributes='equipment_id'),
+                    IpHostConfigDataFrame(1, attributes='mac_address')
+                ])
+                self.log.debug('got-onu-equipment-info', ont2g=ont2g, ip_host=ip_host)
+
+                equipment_id = _ascii(ont2g.get('equipment_id', b''))
+                mac_address = ip_host.get('mac_address', '')
+
+                if not equipment_id:
+                    self.log.info('no-usable-template-lookup-data', vendor_id=vendor_id,
+                                  equipment_id=equipment_id, software_version=software_version)
+                    self.deferred.callback(None)
+                    return
+
+                if serial_number:
+                    cache[serial_number] = _OnuIdentity(equipment_id, software_version, mac_address)
+                    cache.move_to_end(serial_number)
+                    if len(cache) > MibTemplateTask.ONU_IDENTITY_CACHE_SIZE:
+                        cache.popitem(last=False)
 
             # Lookup template base on unique onu type info
-            template = None
-            found = False
-            if vendor_id and equipment_id and software_version:
-                self.log.debug('looking-up-template', vendor_id=vendor_id, equipment_id=equipment_id,
-                               software_version=software_version)
-                template = MibTemplateDb(vendor_id, equipment_id, software_version, serial_number, mac_address)
-                found = yield template.load_template()
-            else:
-                self.log.info('no-usable-template-lookup-data', vendor_id=vendor_id, equipment_id=equipment_id,
-                              software_version=software_version)
+            self.log.debug('looking-up-template', vendor_id=vendor_id, equipment_id=equipment_id,
+                           software_version=software_version)
+            template = MibTemplateDb(vendor_id, equipment_id, software_version, serial_number, mac_address)
+            found = yield template.load_template()
 
-            if template and found:
+            if found:
                 # generate db instance
                 loaded_template_instance = template.get_template_instance()
                 self.deferred.callback(loaded_template_instance)
             else:
+                # Identify the ONU fully on the next attempt
+                cache.pop(serial_number, None)
                 self.deferred.callback(None)
 
         except TimeoutError as e:
@@ -152,6 +193,11 @@ class MibTemplateTask(Task):
             # Can occur if task canceled due to MIB Sync state change
             self.log.debug('already-called-exception')
             assert self.deferred.called, 'Unexpected AlreadyCalledError exception'
+
+        except CancelledError:
+            # Task stopped while waiting on an OMCI response
+            self.log.debug('mib-template-cancelled')
+
         except Exception as e:
             self.log.exception('mib-template', e=e)
             self.deferred.errback(failure.Failure(e))
@@ -164,8 +210,21 @@ class MibTemplateTask(Task):
         results_fields = results.fields['omci_message'].fields
         status = results_fields['success_code']
 
-        return_results = dict()
-        if status == RC.Success.value:
-            return_results = results_fields.get('data', dict())
+        returnValue(results_fields.get('data', dict()) if status == RC_SUCCESS else dict())
+
+    @inlineCallbacks
+    def _get_omci_list(self, frames):
+        """
+        Send several independent OMCI Get requests without waiting on each response
+
+        :param frames: (list) OMCI ME frames to send
+        :return: (list) Attribute data (dict) for each frame, in request order
+        """
+        try:
+            results = yield DeferredList([self._get_omci(frame) for frame in frames],
+                                         fireOnOneErrback=True, consumeErrors=True)
+        except FirstError as e:
+            # Surface the original failure (TimeoutError, ...) to the caller
+            e.subFailure.raiseException()
 
-        returnValue(return_results)
+        returnValue([result for _, result in results])
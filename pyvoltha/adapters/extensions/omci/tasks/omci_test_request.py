@@ -15,8 +15,10 @@
 #
 
 from __future__ import absolute_import, division
-import arrow
+import time
+import structlog
 from .task import Task
+from twisted.internet import reactor
 from twisted.internet.task import LoopingCall
 from twisted.internet.defer import failure, inlineCallbacks, TimeoutError, \
     returnValue
@@ -29,16 +31,105 @@ from voltha_protos.events_pb2 import MetricInformation, MetricMetaData
 from voltha_protos.events_pb2 import Event, EventType, EventCategory, \
     EventSubCategory, EventHeader
 from google.protobuf.timestamp_pb2 import Timestamp
-import six
 
 RC = ReasonCodes
 OP = EntityOperations
+RC_SUCCESS = RC.Success.value
 
 
 class TestFailure(Exception):
     pass
 
 
+class OmciTestCollector(object):
+    """
+    Periodic driver shared by all OMCI test requests using the same collection
+    interval.  A single LoopingCall runs per interval and, on each tick, spreads
+    the registered collection callbacks evenly across the interval instead of
+    every ONU running its own timer.  A callback whose previous collection is
+    still outstanding is skipped for that tick.
+    """
+    _collectors = dict()        # interval -> OmciTestCollector
+
+    def __init__(self, interval):
+        self.log = structlog.get_logger(interval=interval)
+        self._interval = interval
+        self._callbacks = dict()    # owner -> callable
+        self._pending = set()       # owners whose last collection has not completed
+        self._lc = LoopingCall(self._tick)
+
+    @staticmethod
+    def get_collector(interval):
+        """
+        Get the shared collector for a collection interval, creating it if needed
+
+        :param interval: (int/float) Seconds between collections
+        :return: (OmciTestCollector) Collector
+        """
+        collector = OmciTestCollector._collectors.get(interval)
+        if collector is None:
+            collector = OmciTestCollector(interval)
+            OmciTestCollector._collectors[interval] = collector
+        return collector
+
+    @property
+    def interval(self):
+        return self._interval
+
+    def register(self, owner, callback):
+        """
+        Add a collection callback. It is called immediately and then once per interval
+
+        :param owner: (object) Registration key, typically the OmciTestRequest
+        :param callback: (callable) Function to call to collect data
+        """
+        self._callbacks[owner] = callback
+        self._call(owner)
+
+        if not self._lc.running:
+            self._lc.start(interval=self._interval, now=False)
+
+    def unregister(self, owner):
+        """
+        Remove a collection callback, stopping the shared loop when none remain
+
+        :param owner: (object) Registration key used in register()
+        """
+        self._callbacks.pop(owner, None)
+
+        if not self._callbacks and self._lc.running:
+            self._lc.stop()
+
+    def _tick(self):
+        owners = list(self._callbacks.keys())
+        spacing = self._interval / len(owners) if owners else 0
+
+        for index, owner in enumerate(owners):
+            reactor.callLater(index * spacing, self._call, owner)
+
+    def _call(self, owner):
+        callback = self._callbacks.get(owner)
+        if callback is None:
+            return          # Unregistered since the tick was scheduled
+
+        if owner in self._pending:
+            self.log.debug('collection-still-running', owner=owner)
+            return
+        try:
+            d = callback()
+            if hasattr(d, 'addErrback'):
+                d.addErrback(lambda f: self.log.error('collection-failure', failure=f))
+                if not d.called:
+                    self._pending.add(owner)
+                    d.addBoth(self._collection_done, owner)
+
+        except Exception as e:
+            self.log.exception('collection-exception', e=e)
+
+    def _collection_done(self, _, owner):
+        self._pending.discard(owner)
+
+
 class OmciTestRequest(Task):
     """
     OpenOMCI Test an OMCI ME Instance Attributes
@@ -83,9 +174,10 @@ class OmciTestRequest(Task):
         self._failed_or_unknown_attributes = set()
         self._results = None
         self._local_deferred = None
+        self._test_frame = None
         self.device_id = device_id
         self.event_bus = EventBusClient()
-        self.lc = None
+        self._collector = None
         self.default_freq = \
             kwargs.get(OmciTestRequest.DEFAULT_FREQUENCY_KEY,
                        OmciTestRequest.DEFAULT_COLLECTION_FREQUENCY)
@@ -93,7 +185,17 @@ class OmciTestRequest(Task):
         self.logical_device_id = logical_device_id
         self.core_proxy = core_proxy
         self.uuid = uuid
-        topic = 'omci-rx:{}:{}'.format(self.device_id, 'Test_Result')
+        self._id_prefix = 'voltha.{}.{}.'.format(core_proxy.listening_topic, device_id)
+        self._event_header_templates = dict()   # (type, category, sub-category) -> EventHeader
+        self._metric_metadata_template = MetricMetaData(title=OmciTestRequest.OPTICAL_GROUP_NAME,
+                                                        logical_device_id=logical_device_id,
+                                                        serial_no=serial_number,
+                                                        device_id=device_id,
+                                                        uuid=uuid)
+        # Components of the subscribed topic, 'omci-rx:<device-id>:<event-name>'
+        self._topic_event_name = 'Test_Result'
+        self._topic_device_id = self.device_id
+        topic = 'omci-rx:{}:{}'.format(self._topic_device_id, self._topic_event_name)
         self.msg = self.event_bus.subscribe(topic, self.process_messages)
 
     def cancel_deferred(self):
@@ -139,34 +241,42 @@ class OmciTestRequest(Task):
         if callback is None:
             callback = self.perform_test_omci
 
-        if self.lc is None:
-            self.lc = LoopingCall(callback)
-
-        if self.default_freq > 0:
-            self.lc.start(interval=self.default_freq / 10)
+        if self._collector is None and self.default_freq > 0:
+            self._collector = OmciTestCollector.get_collector(self.default_freq / 10)
+            self._collector.register(self, callback)
 
     def stop_collector(self):
         """ Stop the collection loop"""
-        if self.lc is not None and self.default_freq > 0:
-            self.lc.stop()
+        collector, self._collector = self._collector, None
+        if collector is not None:
+            collector.unregister(self)
 
     def format_id(self, event):
-        return 'voltha.{}.{}.{}'.format(self.core_proxy.listening_topic,
-                                        self.device_id, event)
+        return self._id_prefix + event
 
-    def get_event_header(self, _type, category, sub_category, event, raised_ts):
+    def get_event_header(self, _type, category, sub_category, event, raised_ts, reported_ts=None):
         """
 
+        :param reported_ts: (Timestamp) Reported time, defaults to the current time
         :return: (dict) Event header
         """
-        hdr = EventHeader(id=self.format_id(event),
-                          category=category,
-                          sub_category=sub_category,
-                          type=_type,
-                          type_version="0.1",
-                          raised_ts=raised_ts
-                          )
-        hdr.reported_ts.GetCurrentTime()
+        key = (_type, category, sub_category)
+        template = self._event_header_templates.get(key)
+        if template is None:
+            template = EventHeader(category=category,
+                                   sub_category=sub_category,
+                                   type=_type,
+                                   type_version="0.1")
+            self._event_header_templates[key] = template
+
+        hdr = EventHeader()
+        hdr.CopyFrom(template)
+        hdr.id = self.format_id(event)
+        hdr.raised_ts.CopyFrom(raised_ts)
+        if reported_ts is None:
+            hdr.reported_ts.GetCurrentTime()
+        else:
+            hdr.reported_ts.CopyFrom(reported_ts)
         return hdr
 
     def publish_metrics(self, data, event_name, onu_device_id):
@@ -177,30 +287,32 @@ class OmciTestRequest(Task):
         :param onu_device_id:  Onu device id
         :return: None
         """
-        metric_data = MetricInformation(
-            metadata=MetricMetaData(title=OmciTestRequest.OPTICAL_GROUP_NAME,
-                                    ts=arrow.utcnow().float_timestamp,
-                                    logical_device_id=self.logical_device_id,
-                                    serial_no=self.serial_number,
-                                    device_id=onu_device_id,
-                                    uuid=self.uuid,
-                                    context={
-                                        'events': event_name
-                                    }),
-            metrics=data)
+        # Read the clock once and use it for every timestamp in the event
+        now = time.time()
+        now_ts = Timestamp()
+        now_ts.FromNanoseconds(int(now * 1e9))
+
+        metric_data = MetricInformation(metrics=data)
+        metadata = metric_data.metadata
+        metadata.CopyFrom(self._metric_metadata_template)
+        metadata.ts = now
+        metadata.device_id = onu_device_id
+        metadata.context['events'] = event_name
+
         self.log.info('Publish-Test-Result')
-        raised_ts = Timestamp()
-        raised_ts.GetCurrentTime()
         event_header = self.get_event_header(EventType.KPI_EVENT2,
                                              EventCategory.EQUIPMENT,
                                              EventSubCategory.ONU,
                                              "KPI_EVENT",
-                                             raised_ts)
+                                             now_ts,
+                                             reported_ts=now_ts)
         kpi_event = KpiEvent2(
             type=KpiEventType.slice,
-            ts=arrow.utcnow().float_timestamp,
+            ts=now,
             slice_data=[metric_data])
         event = Event(header=event_header, kpi_event2=kpi_event)
+
+        # Queued by the core proxy and sent with the other pending events
         self.core_proxy.submit_event(event)
 
     def process_messages(self, topic, msg):
@@ -210,12 +322,11 @@ class OmciTestRequest(Task):
         :param msg: actual test result dict
         :return: None
         """
-        result_frame = {}
-        event_name = topic.split(':')[-1]
-        onu_device_id = topic.split(':')[-2]
+        event_name = self._topic_event_name
+        onu_device_id = self._topic_device_id
         frame = msg['rx-response']
-        for key, value in six.iteritems((frame.fields['omci_message'].fields)):
-            result_frame[key] = int(value)
+        result_frame = {key: int(value) for key, value
+                        in frame.fields['omci_message'].fields.items()}
         self.publish_metrics(result_frame, event_name, onu_device_id)
 
     @inlineCallbacks
@@ -230,15 +341,26 @@ class OmciTestRequest(Task):
         self.log.info('perform-test', entity_class=self._entity_class,
                       entity_id=self._entity_id)
         try:
-            frame = MEFrame(self._entity_class, self._entity_id, []).test()
-            result = yield self._device.omci_cc.send(frame)
-            if not result.fields['omci_message'].fields['success_code']:
+            # Reuse the test frame from the last run unless it is still being
+            # sent or the ANI-G entity changed. OMCI-CC assigns a new TID on send.
+            frame, self._test_frame = self._test_frame, None
+
+            if frame is None or frame.fields['omci_message'].fields['entity_id'] != self._entity_id:
+                frame = MEFrame(self._entity_class, self._entity_id, []).test()
+            else:
+                frame.fields['transaction_id'] = None
+
+            try:
+                result = yield self._device.omci_cc.send(frame)
+            finally:
+                self._test_frame = frame
+
+            success_code = result.fields['omci_message'].fields['success_code']
+            if success_code == RC_SUCCESS:
                 self.log.info('Self-Test Submitted Successfully',
-                              code=result.fields[
-                                  'omci_message'].fields['success_code'])
+                              code=success_code)
             else:
-                raise TestFailure('Test Failure: {}'.format(
-                    result.fields['omci_message'].fields['success_code']))
+                raise TestFailure('Test Failure: {}'.format(success_code))
         except TimeoutError as e:
             self.deferred.errback(failure.Failure(e))
 
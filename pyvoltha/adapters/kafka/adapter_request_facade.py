@@ -20,14 +20,17 @@ formatting and forwards the request to the concrete handler.
 """
 from __future__ import absolute_import
 import structlog
+from functools import wraps
 from twisted.internet.defer import inlineCallbacks, returnValue
 from zope.interface import implementer
 from twisted.internet import reactor
 
 from afkak.consumer import OFFSET_LATEST, OFFSET_EARLIEST
+from google.protobuf.internal import api_implementation
 from pyvoltha.adapters.interface import IAdapterInterface
-from voltha_protos.inter_container_pb2 import IntType, InterAdapterMessage, StrType, Error, ErrorCode
-from voltha_protos.device_pb2 import Device, Port, ImageDownload, SimulateAlarmRequest, PmConfigs
+from voltha_protos.inter_container_pb2 import IntType, InterAdapterMessage, \
+    InterAdapterMessageType, StrType, Error, ErrorCode
+from voltha_protos.device_pb2 import Device, Port, SimulateAlarmRequest, PmConfigs
 from voltha_protos.openflow_13_pb2 import FlowChanges, FlowGroups, Flows, \
     FlowGroupChanges, ofp_packet_out
 from voltha_protos.extensions_pb2 import SingleGetValueRequest
@@ -38,12 +41,128 @@ from pyvoltha.adapters.kafka.kafka_inter_container_library import IKafkaMessagin
 
 log = structlog.get_logger()
 
-class MacAddressError(BaseException):
+# Every request is decoded from protobuf here; the pure-python backend is
+# much slower than the C++ one, so make a silent fallback visible.  The
+# backend is selected with PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION=cpp in the
+# adapter's environment.
+if api_implementation.Type() == 'python':
+    log.warn('protobuf-pure-python-implementation',
+             hint='set PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION=cpp')
+
+# Error responses are read-only, so they are built once and shared
+_ERR_DEVICE_INVALID = (False, Error(code=ErrorCode.INVALID_PARAMETERS, reason="device-invalid"))
+_ERR_DEVICEID_INVALID = (False, Error(code=ErrorCode.INVALID_PARAMETERS, reason="deviceid-invalid"))
+_ERR_PORT_INVALID = (False, Error(code=ErrorCode.INVALID_PARAMETERS, reason="port-invalid"))
+_ERR_PORT_NO_INVALID = (False, Error(code=ErrorCode.INVALID_PARAMETERS, reason="port-no-invalid"))
+_ERR_DEVICE_PARAM = (False, Error(code=ErrorCode.INVALID_PARAMETERS, reason="device"))
+_ERR_OMCI_TEST_REQUEST_INVALID = (False, Error(code=ErrorCode.INVALID_PARAMETERS, reason="omcitestrequest-invalid"))
+_ERR_MSG_INVALID = (False, Error(code=ErrorCode.INVALID_PARAMETERS, reason="msg-invalid"))
+_ERR_OUTPORT_INVALID = (False, Error(code=ErrorCode.INVALID_PARAMETERS, reason="outport-invalid"))
+_ERR_PACKET_INVALID = (False, Error(code=ErrorCode.INVALID_PARAMETERS, reason="packet-invalid"))
+_ERR_SIM_ALARM_INVALID = (False, Error(code=ErrorCode.INVALID_PARAMETERS, reason="simulate-alarm-request-invalid"))
+_ERR_REQUEST_INVALID = (False, Error(code=ErrorCode.INVALID_PARAMETERS, reason="request-invalid"))
+
+# Retries allowed per inter-adapter message type, none if not listed.
+# NOTE as per VOL-3223 a race condition on ONU_IND_REQUEST may occur,
+# so if that's the message retry up to 10 times
+_MAX_RETRY_BY_TYPE = {
+    InterAdapterMessageType.ONU_IND_REQUEST: 10,
+}
+
+
+def _unpack(any_msg, cls):
+    """
+    Decode the payload of a protobuf Any into a new message of type 'cls'.
+
+    The Core always packs the type expected by the handler, so the type-url
+    check done by Any.Unpack() is skipped.
+
+    :param any_msg: (Any) packed request argument
+    :param cls: (Message class) type of the packed message
+    :return: (Message) decoded message
+    """
+    msg = cls()
+    msg.ParseFromString(any_msg.value)
+    return msg
+
+
+def _unpack_args(*spec):
+    """
+    Decorator that validates and decodes the leading protobuf Any arguments
+    of a facade handler before it is called.  If an argument is missing, its
+    error response is returned without calling the handler.
+
+    :param spec: (tuple) (argument name, message class, error response) for
+                 each leading argument, in signature order
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            args = list(args)
+            for index, (name, cls, err) in enumerate(spec):
+                if index < len(args):
+                    arg = args[index]
+                    if not arg:
+                        return err
+                    args[index] = _unpack(arg, cls)
+                else:
+                    arg = kwargs.get(name)
+                    if not arg:
+                        return err
+                    kwargs[name] = _unpack(arg, cls)
+            return fn(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _named_handler(handler, rpc):
+    """
+    Name a facade handler built by a factory after the RPC it serves, so
+    that logs and tracebacks show the RPC rather than the factory's inner
+    function.
+
+    :param handler: (function) generated handler
+    :param rpc: (str) name of the facade attribute the handler is bound to
+    :return: (function) the handler
+    """
+    handler.__name__ = rpc
+    handler.__qualname__ = 'AdapterRequestFacade.' + rpc
+    return handler
+
+
+def _passthrough(adapter_method, arg_name, rpc=None):
+    """
+    Build a facade handler that forwards its single argument, as received,
+    to an adapter method and returns that method's result unchanged.
+
+    :param adapter_method: (str) name of the adapter method to call
+    :param arg_name: (str) name the argument is passed under by the Core
+    :param rpc: (str) name of the handler, if not that of the adapter method
+    """
+    def handler(self, *args, **kwargs):
+        return getattr(self.adapter, adapter_method)(args[0] if args else kwargs[arg_name])
+    return _named_handler(handler, rpc or adapter_method)
+
+
+def _device_request(adapter_method):
+    """
+    Build a facade handler that decodes its 'device' argument and returns
+    (True, result) of the adapter method called with that Device.
+
+    :param adapter_method: (str) name of the adapter method to call
+    """
+    @_unpack_args(('device', Device, _ERR_DEVICE_INVALID))
+    def handler(self, device, **kwargs):
+        return True, getattr(self.adapter, adapter_method)(device)
+    return _named_handler(handler, adapter_method)
+
+
+class MacAddressError(Exception):
     def __init__(self, error):
         self.error = error
 
 
-class IDError(BaseException):
+class IDError(Exception):
     def __init__(self, error):
         self.error = error
 
@@ -63,6 +182,27 @@ class AdapterRequestFacade(object):
     def __init__(self, adapter, core_proxy):
         self.adapter = adapter
         self.core_proxy = core_proxy
+        # The port handlers decode 'port' only to validate it and then forward
+        # the raw argument, so one message is reused for that.  The facade is
+        # only called from the reactor thread.
+        self._scratch_port = Port()
+        # Prefix of the device specific topics, resolved on first use as the
+        # messaging proxy may not exist yet when the facade is created
+        self._topic_prefix = None
+
+    # Handlers that hand their argument to the adapter without any decoding
+    abandon_device = _passthrough('abandon_device', 'device')
+    self_test = _passthrough('self_test_device', 'device', rpc='self_test')
+    get_device_details = _passthrough('get_device_details', 'device')
+    suppress_alarm = _passthrough('suppress_alarm', 'filter')
+    unsuppress_alarm = _passthrough('unsuppress_alarm', 'filter')
+
+    # Handlers that call the adapter with the decoded Device
+    get_ofp_device_info = _device_request('get_ofp_device_info')
+    reconcile_device = _device_request('reconcile_device')
+    disable_device = _device_request('disable_device')
+    reenable_device = _device_request('reenable_device')
+    reboot_device = _device_request('reboot_device')
 
     @inlineCallbacks
     def start(self):
@@ -81,345 +221,166 @@ class AdapterRequestFacade(object):
     #     yield kafka_proxy.subscribe(topic=device_topic, group_id=device_topic, target_cls=self, offset=KAFKA_OFFSET_EARLIEST)
     #     log.debug("subscribed-to-topic", topic=device_topic)
 
+    @_unpack_args(('device', Device, _ERR_DEVICE_INVALID),
+                  ('omcitestrequest', OmciTestRequest, _ERR_OMCI_TEST_REQUEST_INVALID))
     def start_omci_test(self, device, omcitestrequest, **kwargs):
-        if not device:
-            return False, Error(code=ErrorCode.INVALID_PARAMETERS,
-                                reason="device-invalid")
-        if not omcitestrequest:
-            return False, Error(code=ErrorCode.INVALID_PARAMETERS,
-                                reason="omcitestrequest-invalid")
-
-        d = Device()
-        device.Unpack(d)
-        omci_test = OmciTestRequest()
-        omcitestrequest.Unpack(omci_test)
-        result = self.adapter.start_omci_test(d, omci_test.uuid)
+        result = self.adapter.start_omci_test(device, omcitestrequest.uuid)
         return True, result
 
+    @_unpack_args(('device', Device, _ERR_DEVICE_INVALID))
     def adopt_device(self, device, **kwargs):
-        d = Device()
-        if device:
-            device.Unpack(d)
-
-            # Update the core reference for that device as it will be used
-            # by the adapter to send async messages to the Core.
-            if ARG_FROM_TOPIC in kwargs:
-                t = StrType()
-                kwargs[ARG_FROM_TOPIC].Unpack(t)
-                # Update the core reference for that device
-                self.core_proxy.update_device_core_reference(d.id, t.val)
-
-            # # Start the creation of a device specific topic to handle all
-            # # subsequent requests from the Core. This adapter instance will
-            # # handle all requests for that device.
-            # reactor.callLater(0, self.createKafkaDeviceTopic, d.id)
-
-            result = self.adapter.adopt_device(d)
-            # return True, self.adapter.adopt_device(d)
-
-            return True, result
-        else:
-            return False, Error(code=ErrorCode.INVALID_PARAMETERS,
-                                reason="device-invalid")
-
-    def get_ofp_device_info(self, device, **kwargs):
-        d = Device()
-        if device:
-            device.Unpack(d)
-            return True, self.adapter.get_ofp_device_info(d)
-        else:
-            return False, Error(code=ErrorCode.INVALID_PARAMETERS,
-                                reason="device-invalid")
-
-    def reconcile_device(self, device, **kwargs):
-        d = Device()
-        if device:
-            device.Unpack(d)
-            return True, self.adapter.reconcile_device(d)
-        else:
-            return False, Error(code=ErrorCode.INVALID_PARAMETERS,
-                                reason="device-invalid")
+        # Update the core reference for that device as it will be used
+        # by the adapter to send async messages to the Core.
+        from_topic = kwargs.get(ARG_FROM_TOPIC)
+        if from_topic is not None:
+            # Update the core reference for that device
+            self.core_proxy.update_device_core_reference(device.id,
+                                                         _unpack(from_topic, StrType).val)
+
+        # # Start the creation of a device specific topic to handle all
+        # # subsequent requests from the Core. This adapter instance will
+        # # handle all requests for that device.
+        # reactor.callLater(0, self.createKafkaDeviceTopic, d.id)
+
+        result = self.adapter.adopt_device(device)
+        # return True, self.adapter.adopt_device(d)
 
-    def abandon_device(self, device, **kwargs):
-        return self.adapter.abandon_device(device)
-
-    def disable_device(self, device, **kwargs):
-        d = Device()
-        if device:
-            device.Unpack(d)
-            return True, self.adapter.disable_device(d)
-        else:
-            return False, Error(code=ErrorCode.INVALID_PARAMETERS,
-                                reason="device-invalid")
-
-    def reenable_device(self, device, **kwargs):
-        d = Device()
-        if device:
-            device.Unpack(d)
-            return True, self.adapter.reenable_device(d)
-        else:
-            return False, Error(code=ErrorCode.INVALID_PARAMETERS,
-                                reason="device-invalid")
-
-    def reboot_device(self, device, **kwargs):
-        d = Device()
-        if device:
-            device.Unpack(d)
-            return (True, self.adapter.reboot_device(d))
-        else:
-            return False, Error(code=ErrorCode.INVALID_PARAMETERS,
-                                reason="device-invalid")
+        return True, result
 
+    @_unpack_args(('device', Device, _ERR_DEVICE_INVALID))
     def update_pm_config(self, device, pm_configs, **kwargs):
-        d = Device()
-        if device:
-            device.Unpack(d)
-        else:
-            return False, Error(code=ErrorCode.INVALID_PARAMETERS,
-                                reason="device-invalid")
-        pm = PmConfigs()
-        if pm_configs:
-            pm_configs.Unpack(pm)
+        pm = _unpack(pm_configs, PmConfigs) if pm_configs else PmConfigs()
 
-        return (True, self.adapter.update_pm_config(d, pm))
+        return (True, self.adapter.update_pm_config(device, pm))
 
     def download_image(self, device, request, **kwargs):
-        d = Device()
-        if device:
-            device.Unpack(d)
-        else:
-            return False, Error(code=ErrorCode.INVALID_PARAMETERS,
-                                reason="device-invalid")
-        img = ImageDownload()
-        if request:
-            request.Unpack(img)
-        else:
-            return False, Error(code=ErrorCode.INVALID_PARAMETERS,
-                                reason="port-no-invalid")
+        if not device:
+            return _ERR_DEVICE_INVALID
+        if not request:
+            return _ERR_PORT_NO_INVALID
 
         return True, self.adapter.download_image(device, request)
 
     def get_image_download_status(self, device, request, **kwargs):
-        d = Device()
-        if device:
-            device.Unpack(d)
-        else:
-            return False, Error(code=ErrorCode.INVALID_PARAMETERS,
-                                reason="device-invalid")
-        img = ImageDownload()
-        if request:
-            request.Unpack(img)
-        else:
-            return False, Error(code=ErrorCode.INVALID_PARAMETERS,
-                                reason="port-no-invalid")
+        if not device:
+            return _ERR_DEVICE_INVALID
+        if not request:
+            return _ERR_PORT_NO_INVALID
 
         return True, self.adapter.get_image_download_status(device, request)
 
     def cancel_image_download(self, device, request, **kwargs):
-        d = Device()
-        if device:
-            device.Unpack(d)
-        else:
-            return False, Error(code=ErrorCode.INVALID_PARAMETERS,
-                                reason="device-invalid")
-        img = ImageDownload()
-        if request:
-            request.Unpack(img)
-        else:
-            return False, Error(code=ErrorCode.INVALID_PARAMETERS,
-                                reason="port-no-invalid")
+        if not device:
+            return _ERR_DEVICE_INVALID
+        if not request:
+            return _ERR_PORT_NO_INVALID
 
         return True, self.adapter.cancel_image_download(device, request)
 
     def activate_image_update(self, device, request, **kwargs):
-        d = Device()
-        if device:
-            device.Unpack(d)
-        else:
-            return False, Error(code=ErrorCode.INVALID_PARAMETERS,
-                                reason="device-invalid")
-        img = ImageDownload()
-        if request:
-            request.Unpack(img)
-        else:
-            return False, Error(code=ErrorCode.INVALID_PARAMETERS,
-                                reason="port-no-invalid")
+        if not device:
+            return _ERR_DEVICE_INVALID
+        if not request:
+            return _ERR_PORT_NO_INVALID
 
         return True, self.adapter.activate_image_update(device, request)
 
     def revert_image_update(self, device, request, **kwargs):
-        d = Device()
-        if device:
-            device.Unpack(d)
-        else:
-            return False, Error(code=ErrorCode.INVALID_PARAMETERS,
-                                reason="device-invalid")
-        img = ImageDownload()
-        if request:
-            request.Unpack(img)
-        else:
-            return False, Error(code=ErrorCode.INVALID_PARAMETERS,
-                                reason="port-no-invalid")
+        if not device:
+            return _ERR_DEVICE_INVALID
+        if not request:
+            return _ERR_PORT_NO_INVALID
 
         return True, self.adapter.revert_image_update(device, request)
 
     def enable_port(self, device_id, port, **kwargs):
         if not device_id:
-            return False, Error(code=ErrorCode.INVALID_PARAMETER,
-                                reason="device")
-        p = Port()
+            return _ERR_DEVICE_PARAM
         if port:
-            port.Unpack(p)
+            self._scratch_port.ParseFromString(port.value)
         else:
-            return False, Error(code=ErrorCode.INVALID_PARAMETERS,
-                                reason="port-invalid")
+            return _ERR_PORT_INVALID
 
         return (True, self.adapter.enable_port(device_id, port))
 
     def disable_port(self, device_id, port, **kwargs):
         if not device_id:
-            return False, Error(code=ErrorCode.INVALID_PARAMETER,
-                                reason="device")
-        p = Port()
+            return _ERR_DEVICE_PARAM
         if port:
-            port.Unpack(p)
+            self._scratch_port.ParseFromString(port.value)
         else:
-            return False, Error(code=ErrorCode.INVALID_PARAMETERS,
-                                reason="port-invalid")
+            return _ERR_PORT_INVALID
 
         return (True, self.adapter.disable_port(device_id, port))
 
-    def self_test(self, device, **kwargs):
-        return self.adapter.self_test_device(device)
-
+    @_unpack_args(('device', Device, _ERR_DEVICE_INVALID))
     def delete_device(self, device, **kwargs):
-        d = Device()
-        if device:
-            device.Unpack(d)
-            result = self.adapter.delete_device(d)
-            # return (True, self.adapter.delete_device(d))
-
-            # Before we return, delete the device specific topic as we will no
-            # longer receive requests from the Core for that device
-            kafka_proxy = get_messaging_proxy()
-            device_topic = kafka_proxy.get_default_topic() + "/" + d.id
-            kafka_proxy.unsubscribe(topic=device_topic)
-
-            return (True, result)
-        else:
-            return False, Error(code=ErrorCode.INVALID_PARAMETERS,
-                                reason="device-invalid")
+        result = self.adapter.delete_device(device)
+        # return (True, self.adapter.delete_device(d))
 
-    def get_device_details(self, device, **kwargs):
-        return self.adapter.get_device_details(device)
+        # Delete the device specific topic as we will no longer receive
+        # requests from the Core for that device.  This is cleanup only, so
+        # it runs after the response has been returned.
+        kafka_proxy = get_messaging_proxy()
+        if self._topic_prefix is None:
+            self._topic_prefix = kafka_proxy.get_default_topic() + "/"
+        device_topic = self._topic_prefix + device.id
+        reactor.callLater(0, kafka_proxy.unsubscribe, topic=device_topic)
 
-    def update_flows_bulk(self, device, flows, groups, **kwargs):
-        d = Device()
-        if device:
-            device.Unpack(d)
-        else:
-            return False, Error(code=ErrorCode.INVALID_PARAMETERS,
-                                reason="device-invalid")
-        f = Flows()
-        if flows:
-            flows.Unpack(f)
+        return (True, result)
 
-        g = FlowGroups()
-        if groups:
-            groups.Unpack(g)
+    @_unpack_args(('device', Device, _ERR_DEVICE_INVALID))
+    def update_flows_bulk(self, device, flows, groups, **kwargs):
+        f = _unpack(flows, Flows) if flows else Flows()
+        g = _unpack(groups, FlowGroups) if groups else FlowGroups()
 
-        return (True, self.adapter.update_flows_bulk(d, f, g))
+        return (True, self.adapter.update_flows_bulk(device, f, g))
 
+    @_unpack_args(('device', Device, _ERR_DEVICE_INVALID))
     def update_flows_incrementally(self, device, flow_changes, group_changes, **kwargs):
-        d = Device()
-        if device:
-            device.Unpack(d)
-        else:
-            return False, Error(code=ErrorCode.INVALID_PARAMETERS,
-                                reason="device-invalid")
-        f = FlowChanges()
-        if flow_changes:
-            flow_changes.Unpack(f)
-
-        g = FlowGroupChanges()
-        if group_changes:
-            group_changes.Unpack(g)
+        f = _unpack(flow_changes, FlowChanges) if flow_changes else FlowChanges()
+        g = _unpack(group_changes, FlowGroupChanges) if group_changes else FlowGroupChanges()
 
-        return (True, self.adapter.update_flows_incrementally(d, f, g))
-
-    def suppress_alarm(self, filter, **kwargs):
-        return self.adapter.suppress_alarm(filter)
-
-    def unsuppress_alarm(self, filter, **kwargs):
-        return self.adapter.unsuppress_alarm(filter)
+        return (True, self.adapter.update_flows_incrementally(device, f, g))
 
     def process_inter_adapter_message(self, msg, **kwargs):
-        m = InterAdapterMessage()
         if msg:
-            msg.Unpack(m)
+            m = _unpack(msg, InterAdapterMessage)
         else:
-            return False, Error(code=ErrorCode.INVALID_PARAMETERS,
-                                reason="msg-invalid")
-
-        max_retry = 0
-        # NOTE as per VOL-3223 a race condition on ONU_IND_REQUEST may occur,
-        # so if that's the message retry up to 10 times
-        if m.header.type == 6:
-            max_retry = 10
+            return _ERR_MSG_INVALID
+
+        max_retry = _MAX_RETRY_BY_TYPE.get(m.header.type, 0)
         return (True, self.adapter.process_inter_adapter_message(m, max_retry=max_retry))
 
 
     def receive_packet_out(self, deviceId, outPort, packet, **kwargs):
         try:
-            d_id = StrType()
             if deviceId:
-                deviceId.Unpack(d_id)
+                d_id = _unpack(deviceId, StrType).val
             else:
-                return False, Error(code=ErrorCode.INVALID_PARAMETERS,
-                                    reason="deviceid-invalid")
+                return _ERR_DEVICEID_INVALID
 
-            op = IntType()
             if outPort:
-                outPort.Unpack(op)
+                op = _unpack(outPort, IntType).val
             else:
-                return False, Error(code=ErrorCode.INVALID_PARAMETERS,
-                                    reason="outport-invalid")
+                return _ERR_OUTPORT_INVALID
 
-            p = ofp_packet_out()
             if packet:
-                packet.Unpack(p)
+                p = _unpack(packet, ofp_packet_out)
             else:
-                return False, Error(code=ErrorCode.INVALID_PARAMETERS,
-                                    reason="packet-invalid")
+                return _ERR_PACKET_INVALID
 
-            return (True, self.adapter.receive_packet_out(d_id.val, op.val, p))
+            return (True, self.adapter.receive_packet_out(d_id, op, p))
         except Exception as e:
             log.exception("error-processing-receive_packet_out", e=e)
             
+    @_unpack_args(('device', Device, _ERR_DEVICE_INVALID),
+                  ('request', SimulateAlarmRequest, _ERR_SIM_ALARM_INVALID))
     def simulate_alarm(self, device, request, **kwargs):
-        d = Device()
-        if device:
-            device.Unpack(d)
-        else:
-            return False, Error(code=ErrorCode.INVALID_PARAMETERS,
-                                reason="device-invalid")
-        req = SimulateAlarmRequest()
-        if request:
-            request.Unpack(req)
-        else:
-            return False, Error(code=ErrorCode.INVALID_PARAMETERS,
-                                reason="simulate-alarm-request-invalid")
-
-        return True, self.adapter.simulate_alarm(d, req)
+        return True, self.adapter.simulate_alarm(device, request)
 
+    @_unpack_args(('request', SingleGetValueRequest, _ERR_REQUEST_INVALID))
     @inlineCallbacks
     def single_get_value_request(self, request, **kwargs):
-        req = SingleGetValueRequest()
-        if request:
-            request.Unpack(req)
-        else:
-            return False, Error(code=ErrorCode.INVALID_PARAMETERS,
-                                reason="request-invalid")
-        result = yield self.adapter.single_get_value_request(req)
-        res = yield result
-        return (True, res)
+        result = yield self.adapter.single_get_value_request(request)
+        returnValue((True, result))
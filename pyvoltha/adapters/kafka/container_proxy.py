@@ -19,6 +19,7 @@ The superclass for all kafka proxy subclasses.
 """
 
 from __future__ import absolute_import
+import logging
 import structlog
 from twisted.internet.defer import inlineCallbacks, returnValue
 from twisted.python import failure
@@ -29,6 +30,10 @@ from pyvoltha.common.utils.deferred_utils import DeferredWithTimeout, \
 from pyvoltha.common.utils.registry import IComponent
 
 log = structlog.get_logger()
+# stdlib logger that 'log' emits to.  Hot paths check its level before
+# calling log.debug, which otherwise builds and processes the event before
+# the level filters it out.
+_std_log = logging.getLogger(__name__)
 
 
 class KafkaMessagingError(BaseException):
@@ -61,14 +66,16 @@ class ContainerProxy(object):
                 try:
                     (success, d) = yield func(*args, **kw)
                     if success:
-                        log.debug("successful-response", func=func)
+                        if _std_log.isEnabledFor(logging.DEBUG):
+                            log.debug("successful-response", func=func)
                         if return_cls is not None:
                             rc = return_cls()
                             if d is not None:
                                 d.Unpack(rc)
                             returnValue(rc)
                         else:
-                            log.debug("successful-response-none", func=func)
+                            if _std_log.isEnabledFor(logging.DEBUG):
+                                log.debug("successful-response-none", func=func)
                             returnValue(None)
                     else:
                         log.warn("unsuccessful-request", func=func, args=args,
@@ -87,10 +94,11 @@ class ContainerProxy(object):
         @inlineCallbacks
         def _send_request(rpc, m_callback, to_topic, reply_topic, **kwargs):
             try:
-                log.debug("sending-request",
-                          rpc=rpc,
-                          to_topic=to_topic,
-                          reply_topic=reply_topic)
+                if _std_log.isEnabledFor(logging.DEBUG):
+                    log.debug("sending-request",
+                              rpc=rpc,
+                              to_topic=to_topic,
+                              reply_topic=reply_topic)
                 if to_topic is None:
                     to_topic = self.remote_topic
                 if reply_topic is None:
@@ -18,56 +18,177 @@
 Agent to play gateway between CORE and an adapter.
 """
 from __future__ import absolute_import
+import logging
 import structlog
 import arrow
+from six.moves import intern
 from google.protobuf.message import Message
-from twisted.internet.defer import inlineCallbacks, returnValue
+from collections import deque, OrderedDict
+from twisted.internet import reactor
+from twisted.internet.defer import inlineCallbacks, returnValue, succeed
 
 from .container_proxy import ContainerProxy
 
-from voltha_protos.common_pb2 import ID, ConnectStatus, OperStatus
+from voltha_protos.common_pb2 import ID
 from voltha_protos.inter_container_pb2 import StrType, BoolType, IntType, Packet
 from voltha_protos.device_pb2 import Device, Ports, Devices
 from voltha_protos.voltha_pb2 import CoreInstance, EventFilterRuleKey
 from voltha_protos.events_pb2 import Event
 from voltha_protos.events_pb2 import KpiEvent2, KpiEventType, MetricInformation, MetricMetaData
-import six
 
 log = structlog.get_logger()
+# stdlib logger that 'log' emits to.  Hot paths check its level before
+# calling log.debug, which otherwise builds and processes the event before
+# the level filters it out.
+_std_log = logging.getLogger(__name__)
 
 
 def createSubTopic(*args):
     return '_'.join(args)
 
+
+# Scalar wrapper messages are only read when a request is packed, so one
+# instance per value is shared by all requests instead of building a new
+# one each time.  The caches keep the most recently used values, and are
+# keyed by type as well since True == 1 and False == 0.
+_WRAPPER_CACHE_SIZE = 1024
+_int_types = OrderedDict()
+_str_types = OrderedDict()
+_bool_types = {True: BoolType(val=True), False: BoolType(val=False)}
+
+
+def _wrapper(cache, cls, value):
+    key = (type(value), value)
+    msg = cache.get(key)
+    if msg is None:
+        msg = cls(val=value)
+        cache[key] = msg
+        if len(cache) > _WRAPPER_CACHE_SIZE:
+            cache.popitem(last=False)
+    else:
+        cache.move_to_end(key)
+    return msg
+
+
+def _int(value):
+    return _wrapper(_int_types, IntType, value)
+
+
+def _str(value):
+    return _wrapper(_str_types, StrType, value)
+
+
+def _bool(value):
+    return _bool_types[bool(value)]
+
+
+# Wrapper of each scalar type accepted by _to_proto, by exact type so that
+# a bool is not sent as an int
+_scalar_wrappers = {int: _int, str: _str, bool: _bool}
+
+
+# Name of each event filter rule key, looked up without the enum descriptor
+_rule_key_names = {value.number: value.name for value in
+                   EventFilterRuleKey.EventFilterRuleType.DESCRIPTOR.values}
+
+
+def _status_int(value):
+    # An unset status is sent as -1 so that UNKNOWN (0) stays distinct
+    return _int(-1 if value is None else value)
+
+
+# Devices without a core reference whose request arguments are cached
+_DEVICE_CACHE_SIZE = 4096
+
+
+class _DeviceEntry(object):
+    """
+    What CoreProxy requests about a device need: the topics to send them on
+    and the device ID argument, which is shared and must not be modified
+    """
+    __slots__ = ('to_topic', 'reply_topic', 'id_proto')
+
+    def __init__(self, device_id, to_topic, reply_topic):
+        self.to_topic = to_topic
+        self.reply_topic = reply_topic
+        self.id_proto = ID(id=device_id)
+
+
 class CoreProxy(ContainerProxy):
+    EVENT_FLUSH_DELAY = 0.05    # Seconds to gather events before sending them
+    EVENT_BATCH_SIZE = 64       # Events gathered that trigger an immediate send
 
     def __init__(self, kafka_proxy, default_core_topic, default_event_topic, my_listening_topic):
         super(CoreProxy, self).__init__(kafka_proxy, default_core_topic,
                                         my_listening_topic)
         self.core_default_topic = default_core_topic
         self.event_default_topic = default_event_topic
-        self.deviceId_to_core_map = dict()
+        # device_id -> _DeviceEntry of the devices with a core reference
+        self._devices = dict()
+        # device_id -> _DeviceEntry on the default topics of the most recently
+        # used devices without a core reference
+        self._default_devices = OrderedDict()
+        self._event_buffer = deque()
+        self._event_flush_call = None
+
+    def stop(self):
+        self._flush_events()
+        super(CoreProxy, self).stop()
 
     def update_device_core_reference(self, device_id, core_topic):
-        log.debug("update_device_core_reference")
-        self.deviceId_to_core_map[device_id] = core_topic
+        if _std_log.isEnabledFor(logging.DEBUG):
+            log.debug("update_device_core_reference")
+        # Device ids arrive as new strings in each message; keys are interned
+        # so that the ids held by the caches are shared
+        device_id = intern(device_id)
+        self._default_devices.pop(device_id, None)
+        self._devices[device_id] = _DeviceEntry(device_id, core_topic,
+                                                self.listening_topic)
 
     def delete_device_core_reference(self, device_id, core_topic):
-        log.debug("delete_device_core_reference")
-        del self.deviceId_to_core_map[device_id]
+        if _std_log.isEnabledFor(logging.DEBUG):
+            log.debug("delete_device_core_reference")
+        del self._devices[device_id]
 
     def get_adapter_topic(self, **kwargs):
         return self.listening_topic
 
     def get_core_topic(self, device_id):
-        if device_id in self.deviceId_to_core_map:
-            return self.deviceId_to_core_map[device_id]
-        return self.core_default_topic
+        if not self._devices:
+            return self.core_default_topic
+        entry = self._devices.get(device_id)
+        if entry is None:
+            return self.core_default_topic
+        return entry.to_topic
+
+    def _get_device_entry(self, device_id):
+        """
+        Get what the requests about a device need
+        :param device_id: (str) device the request is about
+        :return: (_DeviceEntry) topics and ID argument of the request
+        """
+        entry = self._devices.get(device_id)
+        if entry is not None:
+            return entry
+
+        cache = self._default_devices
+        entry = cache.get(device_id)
+        if entry is not None:
+            cache.move_to_end(device_id)
+            return entry
+
+        entry = _DeviceEntry(device_id, self.core_default_topic,
+                             self.listening_topic)
+        cache[intern(device_id)] = entry
+        if len(cache) > _DEVICE_CACHE_SIZE:
+            cache.popitem(last=False)
+        return entry
 
     @ContainerProxy.wrap_request(CoreInstance)
     @inlineCallbacks
     def register(self, adapter, deviceTypes):
-        log.debug("register")
+        if _std_log.isEnabledFor(logging.DEBUG):
+            log.debug("register")
 
         if adapter.totalReplicas == 0 and adapter.currentReplica != 0:
             raise Exception("totalReplicas can't be 0, since you're here you have at least one")
@@ -97,319 +218,237 @@ class CoreProxy(ContainerProxy):
             raise
 
     @ContainerProxy.wrap_request(Device)
-    @inlineCallbacks
     def get_device(self, device_id):
-        log.debug("get-device")
-        id = ID()
-        id.id = device_id
+        if _std_log.isEnabledFor(logging.DEBUG):
+            log.debug("get-device")
+        entry = self._get_device_entry(device_id)
+        to_topic, reply_topic = entry.to_topic, entry.reply_topic
         # Once we have a device being managed, all communications between the
         # the adapter and the core occurs over a topic associated with that
         # device
-        to_topic = self.get_core_topic(device_id)
-        reply_topic = self.get_adapter_topic()
 
         # to_topic = createSubTopic(self.core_topic, device_id)
         # reply_topic = createSubTopic(self.listening_topic, device_id)
-        res = yield self.invoke(rpc="GetDevice",
-                                to_topic=to_topic,
-                                reply_topic=reply_topic,
-                                device_id=id)
-        returnValue(res)
+        return self.invoke(rpc="GetDevice",
+                           to_topic=to_topic,
+                           reply_topic=reply_topic,
+                           device_id=entry.id_proto)
 
     @ContainerProxy.wrap_request(Device)
-    @inlineCallbacks
     def get_child_device(self, parent_device_id, **kwargs):
-        log.debug("get-child-device")
-        id = ID()
-        id.id = parent_device_id
-        to_topic = self.get_core_topic(parent_device_id)
-        reply_topic = self.get_adapter_topic()
+        if _std_log.isEnabledFor(logging.DEBUG):
+            log.debug("get-child-device")
+        entry = self._get_device_entry(parent_device_id)
+        to_topic, reply_topic = entry.to_topic, entry.reply_topic
         args = self._to_proto(**kwargs)
-        res = yield self.invoke(rpc="GetChildDevice",
-                                to_topic=to_topic,
-                                reply_topic=reply_topic,
-                                device_id=id,
-                                **args)
-        returnValue(res)
+        return self.invoke(rpc="GetChildDevice",
+                           to_topic=to_topic,
+                           reply_topic=reply_topic,
+                           device_id=entry.id_proto,
+                           **args)
 
     @ContainerProxy.wrap_request(Ports)
-    @inlineCallbacks
     def get_ports(self, device_id, port_type):
-        id = ID()
-        id.id = device_id
-        p_type = IntType()
-        p_type.val = port_type
-        to_topic = self.get_core_topic(device_id)
-        reply_topic = self.get_adapter_topic()
+        entry = self._get_device_entry(device_id)
+        to_topic, reply_topic = entry.to_topic, entry.reply_topic
+        p_type = _int(port_type)
 
         # to_topic = createSubTopic(self.core_topic, device_id)
         # reply_topic = createSubTopic(self.listening_topic, device_id)
-        res = yield self.invoke(rpc="GetPorts",
-                                to_topic=to_topic,
-                                reply_topic=reply_topic,
-                                device_id=id,
-                                port_type=p_type)
-        returnValue(res)
+        return self.invoke(rpc="GetPorts",
+                           to_topic=to_topic,
+                           reply_topic=reply_topic,
+                           device_id=entry.id_proto,
+                           port_type=p_type)
 
     @ContainerProxy.wrap_request(Devices)
-    @inlineCallbacks
     def get_child_devices(self, parent_device_id):
-        log.debug("get-child-devices")
-        id = ID()
-        id.id = parent_device_id
-        to_topic = self.get_core_topic(parent_device_id)
-        reply_topic = self.get_adapter_topic()
-        res = yield self.invoke(rpc="GetChildDevices",
-                                to_topic=to_topic,
-                                reply_topic=reply_topic,
-                                device_id=id)
-        returnValue(res)
+        if _std_log.isEnabledFor(logging.DEBUG):
+            log.debug("get-child-devices")
+        entry = self._get_device_entry(parent_device_id)
+        to_topic, reply_topic = entry.to_topic, entry.reply_topic
+        return self.invoke(rpc="GetChildDevices",
+                           to_topic=to_topic,
+                           reply_topic=reply_topic,
+                           device_id=entry.id_proto)
 
     @ContainerProxy.wrap_request(Device)
-    @inlineCallbacks
     def get_child_device_with_proxy_address(self, proxy_address):
-        log.debug("get-child-device-with-proxy-address")
-        id = ID()
-        id.id = proxy_address.device_id
-        to_topic = self.get_core_topic(proxy_address.device_id)
-        reply_topic = self.get_adapter_topic()
-        res = yield self.invoke(rpc="GetChildDeviceWithProxyAddress",
-                                to_topic=to_topic,
-                                reply_topic=reply_topic,
-                                proxy_address=proxy_address)
-        returnValue(res)
+        if _std_log.isEnabledFor(logging.DEBUG):
+            log.debug("get-child-device-with-proxy-address")
+        entry = self._get_device_entry(proxy_address.device_id)
+        to_topic, reply_topic = entry.to_topic, entry.reply_topic
+        return self.invoke(rpc="GetChildDeviceWithProxyAddress",
+                           to_topic=to_topic,
+                           reply_topic=reply_topic,
+                           proxy_address=proxy_address)
 
     def _to_proto(self, **kwargs):
         encoded = {}
-        for k, v in six.iteritems(kwargs):
-            if isinstance(v, Message):
+        for k, v in kwargs.items():
+            wrap = _scalar_wrappers.get(type(v))
+            if wrap is not None:
+                encoded[k] = wrap(v)
+            elif isinstance(v, Message):
                 encoded[k] = v
-            elif type(v) == int:
-                i_proto = IntType()
-                i_proto.val = v
-                encoded[k] = i_proto
-            elif type(v) == str:
-                s_proto = StrType()
-                s_proto.val = v
-                encoded[k] = s_proto
-            elif type(v) == bool:
-                b_proto = BoolType()
-                b_proto.val = v
-                encoded[k] = b_proto
         return encoded
 
     @ContainerProxy.wrap_request(Device)
-    @inlineCallbacks
     def child_device_detected(self,
                               parent_device_id,
                               parent_port_no,
                               child_device_type,
                               channel_id,
                               **kw):
-        id = ID()
-        id.id = parent_device_id
-        ppn = IntType()
-        ppn.val = parent_port_no
-        cdt = StrType()
-        cdt.val = child_device_type
-        channel = IntType()
-        channel.val = channel_id
-        to_topic = self.get_core_topic(parent_device_id)
-        reply_topic = self.get_adapter_topic()
+        entry = self._get_device_entry(parent_device_id)
+        to_topic, reply_topic = entry.to_topic, entry.reply_topic
+        ppn = _int(parent_port_no)
+        cdt = _str(child_device_type)
+        channel = _int(channel_id)
 
         # to_topic = createSubTopic(self.core_topic, parent_device_id)
         # reply_topic = createSubTopic(self.listening_topic, parent_device_id)
         args = self._to_proto(**kw)
-        res = yield self.invoke(rpc="ChildDeviceDetected",
-                                to_topic=to_topic,
-                                reply_topic=reply_topic,
-                                parent_device_id=id,
-                                parent_port_no=ppn,
-                                child_device_type=cdt,
-                                channel_id=channel,
-                                **args)
-        returnValue(res)
+        return self.invoke(rpc="ChildDeviceDetected",
+                           to_topic=to_topic,
+                           reply_topic=reply_topic,
+                           parent_device_id=entry.id_proto,
+                           parent_port_no=ppn,
+                           child_device_type=cdt,
+                           channel_id=channel,
+                           **args)
 
     @ContainerProxy.wrap_request(None)
-    @inlineCallbacks
     def device_update(self, device):
-        log.debug("device_update")
-        to_topic = self.get_core_topic(device.id)
-        reply_topic = self.get_adapter_topic()
+        if _std_log.isEnabledFor(logging.DEBUG):
+            log.debug("device_update")
+        entry = self._get_device_entry(device.id)
+        to_topic, reply_topic = entry.to_topic, entry.reply_topic
 
         # to_topic = createSubTopic(self.core_topic, device.id)
         # reply_topic = createSubTopic(self.listening_topic, device.id)
-        res = yield self.invoke(rpc="DeviceUpdate",
-                                to_topic=to_topic,
-                                reply_topic=reply_topic,
-                                device=device)
-        returnValue(res)
+        return self.invoke(rpc="DeviceUpdate",
+                           to_topic=to_topic,
+                           reply_topic=reply_topic,
+                           device=device)
 
     def child_device_removed(parent_device_id, child_device_id):
         raise NotImplementedError()
 
     @ContainerProxy.wrap_request(None)
-    @inlineCallbacks
     def device_state_update(self, device_id,
                             oper_status=None,
                             connect_status=None):
-        id = ID()
-        id.id = device_id
-        o_status = IntType()
-        if oper_status or oper_status == OperStatus.UNKNOWN:
-            o_status.val = oper_status
-        else:
-            o_status.val = -1
-        c_status = IntType()
-        if connect_status or connect_status == ConnectStatus.UNKNOWN:
-            c_status.val = connect_status
-        else:
-            c_status.val = -1
-
-        to_topic = self.get_core_topic(device_id)
-        reply_topic = self.get_adapter_topic()
+        o_status = _status_int(oper_status)
+        c_status = _status_int(connect_status)
+
+        entry = self._get_device_entry(device_id)
+        to_topic, reply_topic = entry.to_topic, entry.reply_topic
 
         # to_topic = createSubTopic(self.core_topic, device_id)
         #     reply_topic = createSubTopic(self.listening_topic, device_id)
-        res = yield self.invoke(rpc="DeviceStateUpdate",
-                                to_topic=to_topic,
-                                reply_topic=reply_topic,
-                                device_id=id,
-                                oper_status=o_status,
-                                connect_status=c_status)
-        returnValue(res)
+        return self.invoke(rpc="DeviceStateUpdate",
+                           to_topic=to_topic,
+                           reply_topic=reply_topic,
+                           device_id=entry.id_proto,
+                           oper_status=o_status,
+                           connect_status=c_status)
 
     @ContainerProxy.wrap_request(None)
-    @inlineCallbacks
     def children_state_update(self, device_id,
                               oper_status=None,
                               connect_status=None):
-        id = ID()
-        id.id = device_id
-        o_status = IntType()
-        if oper_status or oper_status == OperStatus.UNKNOWN:
-            o_status.val = oper_status
-        else:
-            o_status.val = -1
-        c_status = IntType()
-        if connect_status or connect_status == ConnectStatus.UNKNOWN:
-            c_status.val = connect_status
-        else:
-            c_status.val = -1
-
-        to_topic = self.get_core_topic(device_id)
-        reply_topic = self.get_adapter_topic()
+        o_status = _status_int(oper_status)
+        c_status = _status_int(connect_status)
+
+        entry = self._get_device_entry(device_id)
+        to_topic, reply_topic = entry.to_topic, entry.reply_topic
 
         # to_topic = createSubTopic(self.core_topic, device_id)
         # reply_topic = createSubTopic(self.listening_topic, device_id)
-        res = yield self.invoke(rpc="ChildrenStateUpdate",
-                                to_topic=to_topic,
-                                reply_topic=reply_topic,
-                                device_id=id,
-                                oper_status=o_status,
-                                connect_status=c_status)
-        returnValue(res)
+        return self.invoke(rpc="ChildrenStateUpdate",
+                           to_topic=to_topic,
+                           reply_topic=reply_topic,
+                           device_id=entry.id_proto,
+                           oper_status=o_status,
+                           connect_status=c_status)
 
     @ContainerProxy.wrap_request(None)
-    @inlineCallbacks
     def port_state_update(self,
                           device_id,
                           port_type,
                           port_no,
                           oper_status):
-        id = ID()
-        id.id = device_id
-        pt = IntType()
-        pt.val = port_type
-        pNo = IntType()
-        pNo.val = port_no
-        o_status = IntType()
-        o_status.val = oper_status
-
-        to_topic = self.get_core_topic(device_id)
-        reply_topic = self.get_adapter_topic()
+        pt = _int(port_type)
+        pNo = _int(port_no)
+        o_status = _int(oper_status)
+
+        entry = self._get_device_entry(device_id)
+        to_topic, reply_topic = entry.to_topic, entry.reply_topic
 
         # to_topic = createSubTopic(self.core_topic, device_id)
         # reply_topic = createSubTopic(self.listening_topic, device_id)
-        res = yield self.invoke(rpc="PortStateUpdate",
-                                to_topic=to_topic,
-                                reply_topic=reply_topic,
-                                device_id=id,
-                                port_type=pt,
-                                port_no=pNo,
-                                oper_status=o_status)
-        returnValue(res)
+        return self.invoke(rpc="PortStateUpdate",
+                           to_topic=to_topic,
+                           reply_topic=reply_topic,
+                           device_id=entry.id_proto,
+                           port_type=pt,
+                           port_no=pNo,
+                           oper_status=o_status)
 
     @ContainerProxy.wrap_request(None)
-    @inlineCallbacks
     def child_devices_state_update(self, parent_device_id,
                                    oper_status=None,
                                    connect_status=None):
 
-        id = ID()
-        id.id = parent_device_id
-        o_status = IntType()
-        if oper_status or oper_status == OperStatus.UNKNOWN:
-            o_status.val = oper_status
-        else:
-            o_status.val = -1
-        c_status = IntType()
-        if connect_status or connect_status == ConnectStatus.UNKNOWN:
-            c_status.val = connect_status
-        else:
-            c_status.val = -1
-
-        to_topic = self.get_core_topic(parent_device_id)
-        reply_topic = self.get_adapter_topic()
+        o_status = _status_int(oper_status)
+        c_status = _status_int(connect_status)
+
+        entry = self._get_device_entry(parent_device_id)
+        to_topic, reply_topic = entry.to_topic, entry.reply_topic
 
         # to_topic = createSubTopic(self.core_topic, parent_device_id)
         # reply_topic = createSubTopic(self.listening_topic, parent_device_id)
-        res = yield self.invoke(rpc="child_devices_state_update",
-                                to_topic=to_topic,
-                                reply_topic=reply_topic,
-                                parent_device_id=id,
-                                oper_status=o_status,
-                                connect_status=c_status)
-        returnValue(res)
+        return self.invoke(rpc="child_devices_state_update",
+                           to_topic=to_topic,
+                           reply_topic=reply_topic,
+                           parent_device_id=entry.id_proto,
+                           oper_status=o_status,
+                           connect_status=c_status)
 
     def child_devices_removed(parent_device_id):
         raise NotImplementedError()
 
     @ContainerProxy.wrap_request(None)
-    @inlineCallbacks
     def device_pm_config_update(self, device_pm_config, init=False):
-        log.debug("device_pm_config_update")
-        b = BoolType()
-        b.val = init
-        to_topic = self.get_core_topic(device_pm_config.id)
-        reply_topic = self.get_adapter_topic()
+        if _std_log.isEnabledFor(logging.DEBUG):
+            log.debug("device_pm_config_update")
+        b = _bool(init)
+        entry = self._get_device_entry(device_pm_config.id)
+        to_topic, reply_topic = entry.to_topic, entry.reply_topic
 
         # to_topic = createSubTopic(self.core_topic, device_pm_config.id)
         # reply_topic = createSubTopic(self.listening_topic, device_pm_config.id)
-        res = yield self.invoke(rpc="DevicePMConfigUpdate",
-                                to_topic=to_topic,
-                                reply_topic=reply_topic,
-                                device_pm_config=device_pm_config,
-                                init=b)
-        returnValue(res)
+        return self.invoke(rpc="DevicePMConfigUpdate",
+                           to_topic=to_topic,
+                           reply_topic=reply_topic,
+                           device_pm_config=device_pm_config,
+                           init=b)
 
     @ContainerProxy.wrap_request(None)
-    @inlineCallbacks
     def port_created(self, device_id, port):
-        log.debug("port_created")
-        proto_id = ID()
-        proto_id.id = device_id
-        to_topic = self.get_core_topic(device_id)
-        reply_topic = self.get_adapter_topic()
+        if _std_log.isEnabledFor(logging.DEBUG):
+            log.debug("port_created")
+        entry = self._get_device_entry(device_id)
+        to_topic, reply_topic = entry.to_topic, entry.reply_topic
 
         # to_topic = createSubTopic(self.core_topic, device_id)
         # reply_topic = createSubTopic(self.listening_topic, device_id)
-        res = yield self.invoke(rpc="PortCreated",
-                                to_topic=to_topic,
-                                reply_topic=reply_topic,
-                                device_id=proto_id,
-                                port=port)
-        returnValue(res)
+        return self.invoke(rpc="PortCreated",
+                           to_topic=to_topic,
+                           reply_topic=reply_topic,
+                           device_id=entry.id_proto,
+                           port=port)
 
     @ContainerProxy.wrap_request(None)
     @inlineCallbacks
@@ -417,26 +456,24 @@ class CoreProxy(ContainerProxy):
                           device_id,
                           port_type_filter,
                           oper_status):
-        log.debug("ports_state_update", device_id=device_id, oper_status=oper_status)
-        id = ID()
-        id.id = device_id
-        t_filter = IntType()
-        t_filter.val = port_type_filter
-        o_status = IntType()
-        o_status.val = oper_status
+        if _std_log.isEnabledFor(logging.DEBUG):
+            log.debug("ports_state_update", device_id=device_id, oper_status=oper_status)
+        t_filter = _int(port_type_filter)
+        o_status = _int(oper_status)
 
-        to_topic = self.get_core_topic(device_id)
-        reply_topic = self.get_adapter_topic()
+        entry = self._get_device_entry(device_id)
+        to_topic, reply_topic = entry.to_topic, entry.reply_topic
 
         # to_topic = createSubTopic(self.core_topic, device_id)
         # reply_topic = createSubTopic(self.listening_topic, device_id)
         res = yield self.invoke(rpc="PortsStateUpdate",
                                 to_topic=to_topic,
                                 reply_topic=reply_topic,
-                                device_id=id,
+                                device_id=entry.id_proto,
                                 port_type_filter=t_filter,
                                 oper_status=o_status)
-        log.debug("ports_state_update_response", device_id=device_id, port_type_filter=port_type_filter, oper_status=oper_status, response=res)
+        if _std_log.isEnabledFor(logging.DEBUG):
+            log.debug("ports_state_update_response", device_id=device_id, port_type_filter=port_type_filter, oper_status=oper_status, response=res)
         returnValue(res)
 
     def port_removed(device_id, port):
@@ -458,44 +495,33 @@ class CoreProxy(ContainerProxy):
         raise NotImplementedError()
 
     @ContainerProxy.wrap_request(None)
-    @inlineCallbacks
     def send_packet_in(self, device_id, port, packet):
-        log.debug("send_packet_in", device_id=device_id)
-        proto_id = ID()
-        proto_id.id = device_id
-        p = IntType()
-        p.val = port
-        pac = Packet()
-        pac.payload = packet
-        to_topic = self.get_core_topic(device_id)
-        reply_topic = self.get_adapter_topic()
+        if _std_log.isEnabledFor(logging.DEBUG):
+            log.debug("send_packet_in", device_id=device_id)
+        entry = self._get_device_entry(device_id)
+        to_topic, reply_topic = entry.to_topic, entry.reply_topic
+        p = _int(port)
+        pac = Packet(payload=packet)
         # to_topic = createSubTopic(self.core_topic, device_id)
         # reply_topic = createSubTopic(self.listening_topic, device_id)
-        res = yield self.invoke(rpc="PacketIn",
-                                to_topic=to_topic,
-                                reply_topic=reply_topic,
-                                device_id=proto_id,
-                                port=p,
-                                packet=pac)
-        returnValue(res)
+        return self.invoke(rpc="PacketIn",
+                           to_topic=to_topic,
+                           reply_topic=reply_topic,
+                           device_id=entry.id_proto,
+                           port=p,
+                           packet=pac)
 
     @ContainerProxy.wrap_request(None)
-    @inlineCallbacks
     def device_reason_update(self, device_id, reason):
-        id = ID()
-        id.id = device_id
-        rsn = StrType()
-        rsn.val = reason
-        to_topic = self.get_core_topic(device_id)
-        reply_topic = self.get_adapter_topic()
-
-        res = yield self.invoke(rpc="DeviceReasonUpdate",
-                                to_topic=to_topic,
-                                reply_topic=reply_topic,
-                                device_id=id,
-                                device_reason=rsn)
+        entry = self._get_device_entry(device_id)
+        to_topic, reply_topic = entry.to_topic, entry.reply_topic
+        rsn = _str(reason)
 
-        returnValue(res)
+        return self.invoke(rpc="DeviceReasonUpdate",
+                           to_topic=to_topic,
+                           reply_topic=reply_topic,
+                           device_id=entry.id_proto,
+                           device_reason=rsn)
 
     # ~~~~~~~~~~~~~~~~~~~ Handle event submissions ~~~~~~~~~~~~~~~~~~~~~
 
@@ -509,33 +535,29 @@ class CoreProxy(ContainerProxy):
         return
         #alarm_filters = self.root_proxy.get('/alarm_filters')
 
+        # Values are lowered once here rather than for every rule compared
         rule_values = {
-            'id': alarm_event.id,
-            'type': AlarmEventType.AlarmEventType.Name(alarm_event.type),
+            'id': alarm_event.id.lower(),
+            'type': AlarmEventType.AlarmEventType.Name(alarm_event.type).lower(),
             'category': AlarmEventCategory.AlarmEventCategory.Name(
-                alarm_event.category),
+                alarm_event.category).lower(),
             'severity': AlarmEventSeverity.AlarmEventSeverity.Name(
-                alarm_event.severity),
-            'resource_id': alarm_event.resource_id,
-            'device_id': device_id
+                alarm_event.severity).lower(),
+            'resource_id': alarm_event.resource_id.lower(),
+            'device_id': device_id.lower()
         }
 
         for alarm_filter in alarm_filters:
             if alarm_filter.rules:
                 exclude = True
                 for rule in alarm_filter.rules:
-                    log.debug("compare-alarm-event",
-                                   key=EventFilterRuleKey.EventFilterRuleKey.Name(
-                                       rule.key),
-                                   actual=rule_values[
-                                       EventFilterRuleKey.EventFilterRuleKey.Name(
-                                           rule.key)].lower(),
-                                   expected=rule.value.lower())
-                    exclude = exclude and \
-                              (rule_values[
-                                   EventFilterRuleKey.EventFilterRuleKey.Name(
-                                       rule.key)].lower() == rule.value.lower())
-                    if not exclude:
+                    key = _rule_key_names[rule.key]
+                    actual = rule_values[key]
+                    expected = rule.value.lower()
+                    log.debug("compare-alarm-event", key=key,
+                              actual=actual, expected=expected)
+                    if actual != expected:
+                        exclude = False
                         break
 
                 if exclude:
@@ -544,12 +566,52 @@ class CoreProxy(ContainerProxy):
 
         return False
 
-    @inlineCallbacks
-    def submit_event(self, event_msg):
+    def submit_event(self, event_msg, immediate=False):
+        """
+        Submit an event to the event topic.  Events are gathered for up to
+        EVENT_FLUSH_DELAY seconds, or until EVENT_BATCH_SIZE are pending,
+        and then sent together without waiting on each other.
+
+        :param event_msg: (Event) event to submit
+        :param immediate: (bool) send the event now, and any gathered before it
+        :return: (Deferred) fires once the event is queued, or sent if immediate
+        """
         try:
             assert isinstance(event_msg, Event)
-            res = yield self.kafka_proxy._send_kafka_message(self.event_default_topic, event_msg)
-            returnValue(res)
         except Exception as e:
             log.exception('failed-event-submission',
                         type=type(event_msg), e=e)
+            return succeed(None)
+
+        if immediate:
+            self._flush_events()
+            return self._send_event(event_msg)
+
+        self._event_buffer.append(event_msg)
+
+        if len(self._event_buffer) >= self.EVENT_BATCH_SIZE:
+            self._flush_events()
+
+        elif self._event_flush_call is None:
+            self._event_flush_call = reactor.callLater(self.EVENT_FLUSH_DELAY,
+                                                       self._flush_events)
+        return succeed(None)
+
+    def _flush_events(self):
+        """ Send all events gathered since the last flush """
+        if self._event_flush_call is not None:
+            if self._event_flush_call.active():
+                self._event_flush_call.cancel()
+            self._event_flush_call = None
+
+        pending = self._event_buffer
+        while pending:
+            self._send_event(pending.popleft())
+
+    def _send_event(self, event_msg):
+        try:
+            return self.kafka_proxy._send_kafka_message(self.event_default_topic, event_msg)
+        except Exception as e:
+            log.exception('failed-event-submission',
+                        type=type(event_msg), e=e)
+            return succeed(None)
@@ -16,6 +16,7 @@
 
 from __future__ import absolute_import
 import time
+from collections import namedtuple
 from uuid import uuid4
 
 import structlog
@@ -23,6 +24,7 @@ from twisted.internet import reactor
 from twisted.internet.defer import inlineCallbacks, returnValue, Deferred, \
     DeferredQueue, gatherResults
 from zope.interface import implementer
+from google.protobuf.any_pb2 import Any
 
 from pyvoltha.common.utils import asleep
 from pyvoltha.common.utils.registry import IComponent
@@ -39,6 +41,11 @@ KAFKA_OFFSET_LATEST = 'latest'
 KAFKA_OFFSET_EARLIEST = 'earliest'
 ARG_FROM_TOPIC = 'fromTopic'
 
+# An already serialized response body.  A request handler may return one
+# instead of a protobuf message to have 'value' placed in the response as
+# is, with 'type_url' naming its type (e.g. 'type.googleapis.com/voltha.Device').
+RawResponse = namedtuple('RawResponse', ['value', 'type_url'])
+
 
 class KafkaMessagingError(Exception):
     def __init__(self, error):
@@ -287,19 +294,34 @@ class IKafkaMessagingProxy(object):
     @inlineCallbacks
     def _received_message_processing_loop(self):
         """
-        Internal method to continuously process all received messages one
-        at a time
+        Internal method to continuously process all received messages.  All
+        messages already queued when one is dequeued are dispatched together
+        so a burst costs a single reactor call rather than one per message.
         :return: None on success, Exception on failure
         """
         while True:
             try:
                 message = yield self.received_msg_queue.get()
-                reactor.callLater(0, self._process_message, message)
+                batch = [message]
+                pending = self.received_msg_queue.pending
+                if pending:
+                    batch.extend(pending)
+                    del pending[:]
+                reactor.callLater(0, self._process_message_batch, batch)
                 if self.stopped:
                     break
             except Exception as e:
                 log.exception("Failed-dequeueing-received-message", e=e)
 
+    def _process_message_batch(self, messages):
+        """
+        Start processing of a batch of received messages, in arrival order.
+        Each message is handled independently, as if dispatched on its own.
+        :param messages: (list) Received messages
+        """
+        for message in messages:
+            self._process_message(message)
+
     def _to_string(self, unicode_str):
         if unicode_str is not None:
             if isinstance(unicode_str, six.string_types):
@@ -341,13 +363,14 @@ class IKafkaMessagingProxy(object):
 
             request.header.timestamp.GetCurrentTime()
             request_body.rpc = rpc
+            args = request_body.args
             for a, b in six.iteritems(kwargs):
-                arg = Argument()
-                arg.key = a
+                # Pack in place rather than copying a packed Argument in
+                arg = args.add(key=a)
                 try:
                     arg.value.Pack(b)
-                    request_body.args.extend([arg])
                 except Exception as e:
+                    del args[-1]
                     log.exception("Failed-parsing-value", e=e)
             request.body.Pack(request_body)
             return request, transaction_id, response_required
@@ -376,7 +399,10 @@ class IKafkaMessagingProxy(object):
             response.header.type = MessageType.Value("RESPONSE")
             response.header.from_topic = msg_header.to_topic
             response.header.to_topic = msg_header.from_topic
-            if msg_body is not None:
+            if isinstance(msg_body, RawResponse):
+                response_body.result.type_url = msg_body.type_url
+                response_body.result.value = msg_body.value
+            elif msg_body is not None:
                 response_body.result.Pack(msg_body)
             response_body.success = status
             response.body.Pack(response_body)
@@ -410,25 +436,19 @@ class IKafkaMessagingProxy(object):
         from Kafka.
         """
 
-        def _augment_args_with_FromTopic(args, from_topic):
-            arg = Argument(key=ARG_FROM_TOPIC)
-            t = StrType(val=from_topic)
-            arg.value.Pack(t)
-            args.extend([arg])
-            return args
-
-        def _toDict(args):
+        def _toDict(args, from_topic):
             """
-            Convert a repeatable Argument type into a python dictionary
+            Convert a repeatable Argument type into a python dictionary,
+            augmented with the ARG_FROM_TOPIC argument.  This dictionary is
+            the keyword arguments of the target method.
             :param args: Repeatable core_adapter.Argument type
+            :param from_topic: Topic the request came from
             :return: a python dictionary
             """
-            if args is None:
-                return None
-            result = {}
-            for arg in args:
-                assert isinstance(arg, Argument)
-                result[arg.key] = arg.value
+            result = {arg.key: arg.value for arg in args}
+            from_topic_arg = Any()
+            from_topic_arg.Pack(StrType(val=from_topic))
+            result[ARG_FROM_TOPIC] = from_topic_arg
             return result
 
         current_time = int(time.time() * 1000)
@@ -463,15 +483,15 @@ class IKafkaMessagingProxy(object):
                     return
                 if targetted_topic in self.topic_target_cls_map:
                     # Augment the request arguments with the from_topic
-                    augmented_args = _augment_args_with_FromTopic(msg_body.args,
-                                                        msg_body.reply_to_topic)
+                    augmented_args = _toDict(msg_body.args,
+                                             msg_body.reply_to_topic)
                     if augmented_args:
                         log.debug("message-body-args-present", rpc=msg_body.rpc,
                                   response_required=msg_body.response_required, reply_to_topic=msg_body.reply_to_topic)
                         (status, res) = yield getattr(
                             self.topic_target_cls_map[targetted_topic],
                             self._to_string(msg_body.rpc))(
-                            **_toDict(augmented_args))
+                            **augmented_args)
                     else:
                         log.debug("message-body-args-absent", rpc=msg_body.rpc,
                                   response_required=msg_body.response_required, reply_to_topic=msg_body.reply_to_topic,)
@@ -280,6 +280,17 @@ class KafkaProxy(object):
             self.topic_any_map_lock.release()
             log.debug("unsubscribing-to-topic-release-lock", topic=topic)
 
+    @staticmethod
+    def _produce(producer, topic, msg, key):
+        """
+        Queue a message on the producer and serve its delivery callbacks.
+        Both calls are done in one thread pool hop; the socket writes
+        themselves are batched by the producer's own I/O thread.
+        """
+        producer.produce(topic, msg, key)
+        # send a lightweight poll to avoid an exception after 100k messages.
+        producer.poll(0)
+
     @inlineCallbacks
     def send_message(self, topic, msg, key=None):
         assert topic is not None
@@ -303,12 +314,9 @@ class KafkaProxy(object):
                 msgs = [msg]
 
                 if self.kproducer is not None and self.event_bus_publisher and self.faulty is False:
-                    d = deferToThread(self.kproducer.produce, topic, msg, key)
+                    d = deferToThread(self._produce, self.kproducer, topic, msg, key)
                     yield d
                     log.debug('sent-kafka-msg', topic=topic)
-                    # send a lightweight poll to avoid an exception after 100k messages.
-                    d1 = deferToThread(self.kproducer.poll, 0)
-                    yield d1
                 else:
                     return
 
@@ -14,10 +14,12 @@
 # limitations under the License.
 #
 import os
+from six.moves import intern
 import structlog
 from pyvoltha.adapters.common.kvstore.twisted_etcd_store import TwistedEtcdStore
 from pyvoltha.common.structlog_setup import setup_logging, update_logging, string_to_int
-from twisted.internet.defer import inlineCallbacks, returnValue
+from twisted.internet import reactor
+from twisted.internet.defer import inlineCallbacks, returnValue, gatherResults
 
 
 COMPONENT_NAME = os.environ.get("COMPONENT_NAME")
@@ -29,9 +31,25 @@ CONFIG_TYPE = "loglevel"
 DEFAULT_PACKAGE_NAME = "default"
 GLOBAL_DEFAULT_LOGLEVEL = "WARN"
 
+# <config path>/<key>/<config type>/<package name>
+CONFIG_PATH_FORMAT = KV_STORE_PATH_SEPARATOR.join((DEFAULT_KV_STORE_CONFIG_PATH, "{}",
+                                                   CONFIG_TYPE, DEFAULT_PACKAGE_NAME))
+
+# (name, numeric level) of an unset loglevel, and of the fallback loglevel
+_NO_LOGLEVEL = ("", 0)
+_DEFAULT_LOGLEVEL = (intern(GLOBAL_DEFAULT_LOGLEVEL), string_to_int(GLOBAL_DEFAULT_LOGLEVEL))
+
+
+def _decode_loglevel(level):
+    """ Decode a raw etcd loglevel value into its interned name and numeric level """
+    level = intern(level.decode('ascii', 'replace'))
+    return level, string_to_int(level)
+
+
 class LogController():
     instance_id = None
     active_log_level = None
+    CONFIG_CHANGE_DELAY = 0.05  # Seconds to coalesce a burst of watch events
 
 
     def __init__(self, etcd_host, etcd_port):
@@ -39,57 +57,77 @@ class LogController():
         self.etcd_host = etcd_host
         self.etcd_port = etcd_port
         self.etcd_client = TwistedEtcdStore(self.etcd_host, self.etcd_port, KV_STORE_DATA_PATH_PREFIX)
+        # Raw (global, component) values the active loglevel was derived from
+        self._last_raw_levels = None
+        self._config_change_call = None
 
     def make_config_path(self, key):
-        return (DEFAULT_KV_STORE_CONFIG_PATH + KV_STORE_PATH_SEPARATOR + key + KV_STORE_PATH_SEPARATOR + CONFIG_TYPE + KV_STORE_PATH_SEPARATOR + DEFAULT_PACKAGE_NAME)
+        return CONFIG_PATH_FORMAT.format(key)
 
 
     @inlineCallbacks
-    def get_global_loglevel(self):
+    def _get_raw_loglevel(self, config_path, description):
+        level = None
+        try:
+            level = yield self.etcd_client.get(config_path)
+
+        except KeyError:
+            self.log.warn("Failed to retrive default {} loglevel".format(description))
 
-        global_default_loglevel = ""
+        returnValue(level)
 
-        try:
-            level = yield self.etcd_client.get(self.global_config_path)
-            if level is not None:
-                level_int = string_to_int(str(level, 'utf-8'))
 
-                if level_int == 0:
-                    self.log.warn("Unsupported loglevel at global config path", level)
-                else:
-                    global_default_loglevel = level
-                    self.log.debug("Retrieved global default loglevel", global_default_loglevel)
+    # The loglevel helpers below decode a raw etcd value once and hand back
+    # both its name and its numeric level, as (str, int)
 
-        except KeyError:
-            self.log.warn("Failed to retrive default global loglevel")
+    def _global_loglevel(self, level):
 
-        returnValue(global_default_loglevel)
+        global_default_loglevel = _NO_LOGLEVEL
 
+        if level is not None:
+            level, level_int = _decode_loglevel(level)
 
-    @inlineCallbacks
-    def get_component_loglevel(self, global_default_loglevel):
+            if level_int == 0:
+                self.log.warn("Unsupported loglevel at global config path", level)
+            else:
+                global_default_loglevel = (level, level_int)
+                self.log.debug("Retrieved global default loglevel", level)
+
+        return global_default_loglevel
+
+
+    def _component_loglevel(self, level, global_default_loglevel):
 
         component_default_loglevel = global_default_loglevel
 
-        try:
-            level = yield self.etcd_client.get(self.component_config_path)
-            if level is not None:
-                level_int = string_to_int(str(level, 'utf-8'))
+        if level is not None:
+            level, level_int = _decode_loglevel(level)
 
-                if level_int == 0:
-                    self.log.warn("Unsupported loglevel at component config path", level)
+            if level_int == 0:
+                self.log.warn("Unsupported loglevel at component config path", level)
 
-                else:
-                    component_default_loglevel = level
-                    self.log.debug("Retrieved component default loglevel", component_default_loglevel)
+            else:
+                component_default_loglevel = (level, level_int)
+                self.log.debug("Retrieved component default loglevel", level)
+
+        if not component_default_loglevel[0]:
+            component_default_loglevel = _DEFAULT_LOGLEVEL
+
+        return component_default_loglevel
 
-        except KeyError:
-            self.log.warn("Failed to retrive default component loglevel")
 
-        if component_default_loglevel == "":
-            component_default_loglevel = GLOBAL_DEFAULT_LOGLEVEL.encode('utf-8')
+    @inlineCallbacks
+    def get_global_loglevel(self):
+        level = yield self._get_raw_loglevel(self.global_config_path, "global")
+        returnValue(self._global_loglevel(level)[0])
 
-        returnValue(component_default_loglevel)
+
+    @inlineCallbacks
+    def get_component_loglevel(self, global_default_loglevel):
+        level = yield self._get_raw_loglevel(self.component_config_path, "component")
+        global_default_loglevel = (global_default_loglevel,
+                                   string_to_int(global_default_loglevel))
+        returnValue(self._component_loglevel(level, global_default_loglevel)[0])
 
 
     @inlineCallbacks
@@ -112,22 +150,38 @@ class LogController():
 
 
     def watch_callback(self, event):
-        self.process_log_config_change()
+        # Called on the etcd watch thread; hand over to the reactor
+        reactor.callFromThread(self._schedule_log_config_change)
+
+
+    def _schedule_log_config_change(self):
+        # A burst of watch events results in a single config check
+        if self._config_change_call is None or not self._config_change_call.active():
+            self._config_change_call = reactor.callLater(LogController.CONFIG_CHANGE_DELAY,
+                                                         self.process_log_config_change)
 
 
     @inlineCallbacks
     def process_log_config_change(self):
         self.log.debug("Processing log config change")
 
-        global_default_level = yield self.get_global_loglevel()
-        level = yield self.get_component_loglevel(global_default_level)
+        global_raw, component_raw = yield gatherResults([
+            self._get_raw_loglevel(self.global_config_path, "global"),
+            self._get_raw_loglevel(self.component_config_path, "component")],
+            consumeErrors=True)
 
-        level_int = string_to_int(str(level, 'utf-8'))
+        if (global_raw, component_raw) == self._last_raw_levels:
+            self.log.debug("Loglevel not updated")
+            return
+        self._last_raw_levels = (global_raw, component_raw)
+
+        global_default_level = self._global_loglevel(global_raw)
+        level, level_int = self._component_loglevel(component_raw, global_default_level)
 
         current_log_level = level_int
         if LogController.active_log_level != current_log_level:
             LogController.active_log_level = current_log_level
-            self.log.debug("Applying updated loglevel")
+            self.log.debug("Applying updated loglevel", level=level)
             update_logging(LogController.instance_id, None, verbosity_adjust=level_int)
 
         else:
@@ -137,8 +191,15 @@ class LogController():
     @inlineCallbacks
     def set_default_loglevel(self, global_config_path, component_config_path, initial_default_loglevel):
 
-        if (yield self.etcd_client.get(global_config_path)) == None:
-            yield self.etcd_client.set(global_config_path, GLOBAL_DEFAULT_LOGLEVEL)
+        global_level, component_level = yield gatherResults([
+            self.etcd_client.get(global_config_path),
+            self.etcd_client.get(component_config_path)], consumeErrors=True)
+
+        updates = []
+        if global_level == None:
+            updates.append(self.etcd_client.set(global_config_path, GLOBAL_DEFAULT_LOGLEVEL))
+
+        if component_level == None:
+            updates.append(self.etcd_client.set(component_config_path, initial_default_loglevel))
 
-        if (yield self.etcd_client.get(component_config_path)) == None:
-            yield self.etcd_client.set(component_config_path, initial_default_loglevel)
+        yield gatherResults(updates, consumeErrors=True)
@@ -21,15 +21,18 @@ import builtins # bring in python 2 to 3 compat imports: https://python-future.o
 import json
 import logging
 import logging.config
+from json.encoder import encode_basestring
+import sys
+import threading
 from collections import OrderedDict
 
 import structlog
 from structlog.stdlib import BoundLogger, INFO
 
 try:
-    from _thread import get_ident as _get_ident
+    import orjson
 except ImportError:
-    from _dummy_thread import get_ident as _get_ident
+    orjson = None
 
 
 class StructuredLogRenderer(object):
@@ -47,52 +50,193 @@ class EncoderFix(json.JSONEncoder):
         return str(obj)
 
 
-class JsonRenderedOrderedDict(OrderedDict):
-    """Our special version of OrderedDict that renders into string as a dict,
-       to make the log stream output cleaner.
+# Separators of the rendered JSON, the compact ones orjson always uses so
+# that log lines look the same with or without it.  For the same reason
+# non-ASCII characters are not escaped.
+_ITEM_SEPARATOR = ','
+_KEY_SEPARATOR = ':'
+
+# JSON encoders of the value types most log events are made of, and the
+# quoted form of each key seen, used to render such events without json
+_scalar_encoders = {str: encode_basestring, int: int.__repr__}
+_QUOTED_KEYS_SIZE = 1024
+_quoted_keys = dict()
+
+
+def _dumps_scalars(obj):
+    """
+    Serialize a dict of string keys and str/int values as json.dumps does
+    with sorted keys, or return None if it holds anything else
+    """
+    items = []
+    for key in sorted(obj):
+        encode = _scalar_encoders.get(type(obj[key]))
+        if encode is None or type(key) is not str:
+            return None
+        quoted = _quoted_keys.get(key)
+        if quoted is None:
+            quoted = encode_basestring(key) + _KEY_SEPARATOR
+            if len(_quoted_keys) < _QUOTED_KEYS_SIZE:
+                _quoted_keys[key] = quoted
+        items.append(quoted + encode(obj[key]))
+    return '{' + _ITEM_SEPARATOR.join(items) + '}'
+
+
+def _json_fallback(obj):
+    """
+    Render a value JSON cannot encode as structlog's JSONRenderer does: with
+    its __structlog__ method if it has one, and repr otherwise, so that an
+    exception keeps its type
     """
-    def __repr__(self, _repr_running=None):
-        # od.__repr__() <==> repr(od)
-        call_key = id(self), _get_ident()
-        _repr_running = _repr_running or dict()
+    structlog_method = getattr(obj, '__structlog__', None)
+    if structlog_method is not None:
+        return structlog_method()
+    return repr(obj)
 
-        if call_key in _repr_running:
-            return '...'
 
-        _repr_running[call_key] = 1
+def _dumps(obj, default=str):
+    """
+    Serialize a log event dict to JSON with sorted keys, with orjson when it
+    is installed and able to, and the standard json module otherwise
+
+    :param obj: (dict) event dict to serialize
+    :param default: (callable) encoder of the values JSON cannot encode
+    """
+    if orjson is not None:
         try:
-            if not self:
-                return ''
+            return orjson.dumps(obj, default=default,
+                                option=orjson.OPT_SORT_KEYS).decode('utf-8')
+        except TypeError:
+            pass    # Such as non-string keys, which only json accepts
+    else:
+        rendered = _dumps_scalars(obj)
+        if rendered is not None:
+            return rendered
+
+    return json.dumps(obj, indent=None,
+                      default=default,
+                      ensure_ascii=False,
+                      separators=(_ITEM_SEPARATOR, _KEY_SEPARATOR),
+                      sort_keys=True)
+
+
+# Plain dicts keep insertion order from Python 3.7 and are cheaper to build
+# than OrderedDict, which the log event dicts below need before that
+_OrderedDict = dict if sys.version_info >= (3, 7) else OrderedDict
 
-            # Convert to JSON but strip off outside '{}'
-            msg = '"msg":"{}",'.format(self.pop('event'))
-            json_msg = json.dumps(self, indent=None,
-                                  cls=EncoderFix,
-                                  separators=(', ', ': '),
-                                  sort_keys=True)[1:-1]
-            return msg + json_msg
 
-        finally:
-            del _repr_running[call_key]
+# ids of the event dicts being rendered by each thread, which guards
+# PlainRenderedOrderedDict.__repr__ below against recursion
+_repr_tls = threading.local()
 
 
-class PlainRenderedOrderedDict(OrderedDict):
+def _repr_seen():
+    seen = getattr(_repr_tls, 'seen', None)
+    if seen is None:
+        seen = _repr_tls.seen = set()
+    return seen
+
+
+def _json_renderer(instance_id):
+    """
+    Create the final processor rendering each event dict as one JSON object
+    with the instance id, which is serialized once here rather than per event
+    """
+    instance_field = _dumps({'instance_id': instance_id})[1:-1]
+
+    def render_json(_, __, event_dict):
+        if 'instance_id' in event_dict:
+            event_dict['instance_id'] = instance_id
+            return _dumps(event_dict, _json_fallback)
+
+        rendered = _dumps(event_dict, _json_fallback)
+        if rendered == '{}':
+            return '{' + instance_field + '}'
+        return rendered[:-1] + _ITEM_SEPARATOR + instance_field + '}'
+
+    return render_json
+
+
+def _guarded_repr(obj, render):
+    """
+    Render obj unless the current thread is already rendering it, which only
+    happens for a dict nested in itself
+    """
+    seen = _repr_seen()
+    call_key = id(obj)
+    if call_key in seen:
+        return '...'
+    seen.add(call_key)
+    try:
+        return render()
+    finally:
+        seen.discard(call_key)
+
+
+class JsonRenderedOrderedDict(_OrderedDict):
     """Our special version of OrderedDict that renders into string as a dict,
        to make the log stream output cleaner.
     """
-    def __repr__(self, _repr_running={}):
+    def copy(self):
+        # structlog copies the context for each event; keep this class
+        return self.__class__(self)
+
+    def __repr__(self):
+        # od.__repr__() <==> repr(od).  The values are JSON encoded, which
+        # detects a dict nested in itself, so no recursion guard is needed.
+        if not self:
+            return ''
+
+        # Convert to JSON but strip off outside '{}'.  The dict is not
+        # modified so that it renders the same each time.
+        fields = self
+        if 'event' in self:
+            fields = {k: v for k, v in self.items() if k != 'event'}
+        msg = '"msg":"{}",'.format(self.get('event', ''))
+        json_msg = _dumps(fields)[1:-1]
+        return msg + json_msg
+
+
+class PlainRenderedOrderedDict(_OrderedDict):
+    """Our special version of OrderedDict that renders into string as a dict,
+       to make the log stream output cleaner.
+    """
+    def copy(self):
+        return self.__class__(self)
+
+    def __repr__(self):
         'od.__repr__() <==> repr(od)'
-        call_key = id(self), _get_ident()
-        if call_key in _repr_running:
-            return '...'
-        _repr_running[call_key] = 1
-        try:
-            if not self:
-                return '{}'
-            return '{%s}' % ", ".join("%s: %s" % (k, v)
-                                      for k, v in self.items())
-        finally:
-            del _repr_running[call_key]
+        # The values are rendered with str, which recurses into a dict
+        # nested in itself
+        return _guarded_repr(self, self._render)
+
+    def _render(self):
+        if not self:
+            return '{}'
+        return '{%s}' % ", ".join(["%s: %s" % item for item in self.items()])
+
+
+def _add_exc_info_flag_for_exception(_, name, event_dict):
+    if name == 'exception':
+        event_dict['exc_info'] = True
+    return event_dict
+
+
+def _instance_id_adder(instance_id):
+    """ Create the processor adding the instance id to each event """
+    def add_instance_id(_, __, event_dict):
+        event_dict['instance_id'] = instance_id
+        return event_dict
+
+    return add_instance_id
+
+
+# Processors both setup_logging and update_logging start with
+_BASE_PROCESSORS = (
+    _add_exc_info_flag_for_exception,
+    structlog.processors.StackInfoRenderer(),
+    structlog.processors.format_exc_info,
+)
 
 
 def setup_logging(log_config, instance_id, verbosity_adjust=0):
@@ -103,27 +247,16 @@ def setup_logging(log_config, instance_id, verbosity_adjust=0):
     - By default, the logging backend is Python standard lib logger
     """
 
-    def add_exc_info_flag_for_exception(_, name, event_dict):
-        if name == 'exception':
-            event_dict['exc_info'] = True
-        return event_dict
-
-    def add_instance_id(_, __, event_dict):
-        event_dict['instance_id'] = instance_id
-        return event_dict
-
     # Configure standard logging
     logging.config.dictConfig(log_config)
-    logging.root.level = verbosity_adjust
+    # setLevel, unlike assigning 'level', resets the cached isEnabledFor
+    # results of the loggers hot paths check before logging debug
+    logging.root.setLevel(verbosity_adjust)
 
-    processors = [
-        add_exc_info_flag_for_exception,
-        structlog.processors.StackInfoRenderer(),
-        structlog.processors.format_exc_info,
-        add_instance_id,
+    processors = _BASE_PROCESSORS + (
         structlog.processors.UnicodeDecoder(),
-        structlog.processors.JSONRenderer()
-    ]
+        _json_renderer(instance_id)
+    )
     structlog.configure(logger_factory=structlog.stdlib.LoggerFactory(),
                         context_class=JsonRenderedOrderedDict,
                         wrapper_class=BoundLogger,
@@ -135,14 +268,12 @@ def setup_logging(log_config, instance_id, verbosity_adjust=0):
     return log
 
 
+# Numeric level of each supported loglevel name
+_LOGLEVELS = {"DEBUG": 10, "INFO": 20, "WARN": 30, "ERROR": 40, "FATAL": 50}
+
+
 def string_to_int(loglevel):
-    l = loglevel.upper()
-    if l == "DEBUG": return 10
-    elif l == "INFO": return 20
-    elif l == "WARN": return 30
-    elif l == "ERROR": return 40
-    elif l == "FATAL": return 50
-    else: return 0
+    return _LOGLEVELS.get(loglevel.upper(), 0)
 
 
 def update_logging(instance_id, _vcore_id, verbosity_adjust=0):
@@ -151,24 +282,14 @@ def update_logging(instance_id, _vcore_id, verbosity_adjust=0):
     :param vcore_id:  The assigned vcore id
     :return: structure logger
     """
-    def add_exc_info_flag_for_exception(_, name, event_dict):
-        if name == 'exception':
-            event_dict['exc_info'] = True
-        return event_dict
-
-    def add_instance_id(_, __, event_dict):
-        event_dict['instance_id'] = instance_id
-        return event_dict
-
-    logging.root.level = verbosity_adjust
+    # setLevel, unlike assigning 'level', resets the cached isEnabledFor
+    # results of the loggers hot paths check before logging debug
+    logging.root.setLevel(verbosity_adjust)
 
-    processors = [
-        add_exc_info_flag_for_exception,
-        structlog.processors.StackInfoRenderer(),
-        structlog.processors.format_exc_info,
-        add_instance_id,
+    processors = _BASE_PROCESSORS + (
+        _instance_id_adder(instance_id),
         StructuredLogRenderer(),
-    ]
+    )
     structlog.configure(processors=processors)
 
     # Mark first line of log
@@ -0,0 +1,128 @@
+#
+# Copyright 2020 the original author or authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from __future__ import absolute_import
+import json
+import logging
+from unittest import TestCase, main
+from unittest.mock import patch
+
+import structlog
+
+from pyvoltha.common import structlog_setup
+from pyvoltha.common.structlog_setup import setup_logging, update_logging, \
+    PlainRenderedOrderedDict
+
+LOG_CONFIG = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {'message': {'format': '%(message)s'}},
+    'handlers': {'null': {'class': 'logging.NullHandler',
+                          'formatter': 'message'}},
+    'root': {'handlers': ['null']},
+}
+
+
+class _RecordingHandler(logging.Handler):
+    def __init__(self):
+        super(_RecordingHandler, self).__init__()
+        self.setFormatter(logging.Formatter('%(message)s'))
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(self.format(record))
+
+
+class TestStructlogSetup(TestCase):
+
+    def setUp(self):
+        self.root_level = logging.root.level
+        self.root_handlers = logging.root.handlers[:]
+        self.handler = _RecordingHandler()
+
+    def tearDown(self):
+        logging.root.handlers[:] = self.root_handlers
+        logging.root.level = self.root_level
+        structlog.reset_defaults()
+
+    def _log_bound_event(self):
+        logging.root.addHandler(self.handler)
+        log = structlog.get_logger().bind(device_id='dev1')
+        log.info('port-up', port=5)
+        return self.handler.lines[-1]
+
+    def test_setup_logging_renders_json(self):
+        setup_logging(LOG_CONFIG, 'test-instance')
+
+        line = self._log_bound_event()
+
+        self.assertEqual(json.loads(line), {'event': 'port-up',
+                                            'device_id': 'dev1',
+                                            'port': 5,
+                                            'instance_id': 'test-instance'})
+
+    def test_json_separators_do_not_depend_on_orjson(self):
+        expected = ('{"device_id":"dev1","event":"port-up","port":5,'
+                    '"instance_id":"test-instance"}')
+
+        for orjson in (structlog_setup.orjson, None):
+            with patch.object(structlog_setup, 'orjson', orjson):
+                setup_logging(LOG_CONFIG, 'test-instance')
+                self.assertEqual(self._log_bound_event(), expected)
+
+    def test_dumps_does_not_depend_on_orjson(self):
+        events = [
+            {'event': u'caf\u00e9', 'device_id': 'dev1', 'port': 5},
+            {'event': 'list', u'cl\u00e9': [u'\u00e9', 1, None]},
+        ]
+        for event in events:
+            rendered = structlog_setup._dumps(event)
+            with patch.object(structlog_setup, 'orjson', None):
+                self.assertEqual(structlog_setup._dumps(event), rendered)
+            self.assertIn(u'\u00e9', rendered)
+
+    def test_setup_logging_renders_exception_repr(self):
+        for orjson in (structlog_setup.orjson, None):
+            with patch.object(structlog_setup, 'orjson', orjson):
+                setup_logging(LOG_CONFIG, 'test-instance')
+                logging.root.addHandler(self.handler)
+                structlog.get_logger().error('failed', e=KeyError('boom'))
+
+                self.assertEqual(json.loads(self.handler.lines[-1])['e'],
+                                 "KeyError('boom')")
+
+    def test_update_logging_renders_msg_fields(self):
+        setup_logging(LOG_CONFIG, 'test-instance')
+        update_logging('test-instance', None, verbosity_adjust=logging.DEBUG)
+
+        line = self._log_bound_event()
+
+        self.assertTrue(line.startswith('"msg":"port-up",'), line)
+        self.assertEqual(json.loads('{' + line.split(',', 1)[1] + '}'),
+                         {'device_id': 'dev1',
+                          'port': 5,
+                          'instance_id': 'test-instance'})
+
+    def test_plain_dict_nested_in_itself_renders(self):
+        inner = PlainRenderedOrderedDict(port=5)
+        context = PlainRenderedOrderedDict(device_id='dev1', inner=inner)
+        context['self'] = context
+
+        self.assertEqual(repr(context), '{device_id: dev1, inner: {port: 5}, self: ...}')
+        self.assertEqual(repr(context), '{device_id: dev1, inner: {port: 5}, self: ...}')
+
+
+if __name__ == '__main__':
+    main()
@@ -15,7 +15,7 @@
 #
 
 from __future__ import absolute_import
-import arrow
+import time
 from unittest import TestCase, main
 from pyvoltha.adapters.kafka.core_proxy import CoreProxy
 from pyvoltha.adapters.extensions.events.adapter_events import AdapterEvents
@@ -50,6 +50,7 @@ DEFAULT_ONU_ID = 0
 DEFAULT_ONU_SN = 'TEST00000001'
 DEFAULT_OLT_SN = 'ABCDXXXXYYYY'
 DEFAULT_ONU_REG = 'ABCD1234'
+RAISED_TS = int(time.time())
 
 core_proxy = CoreProxy(
                kafka_proxy=None,
@@ -60,24 +61,12 @@ core_proxy = CoreProxy(
 event_mgr = AdapterEvents(core_proxy, DEFAULT_ONU_DEVICE_ID, DEFAULT_ONU_DEVICE_ID, DEFAULT_ONU_SN)
 
 
-class TestOnuActivationFailEvent(TestCase):
-
-    def setUp(self):
-        self.event = OnuActivationFailEvent(event_mgr, DEFAULT_ONU_ID, DEFAULT_PON_ID, DEFAULT_ONU_SN,
-                                            arrow.utcnow().timestamp)
-
-    def test_get_context_data(self):
-        expected_dict = {'onu-id': DEFAULT_ONU_ID,
-                         'onu-intf-id': DEFAULT_PON_ID,
-                         'onu-serial-number': DEFAULT_ONU_SN}
-
-        self.assertEqual(self.event.get_context_data(), expected_dict)
-
 class TestOnuActiveEvent(TestCase):
 
-    def setUp(self):
-        self.event = OnuActiveEvent(event_mgr, DEFAULT_ONU_DEVICE_ID, DEFAULT_PON_ID, DEFAULT_ONU_SN,
-                                    DEFAULT_ONU_REG, DEFAULT_OLT_SN, arrow.utcnow().timestamp, onu_id=DEFAULT_ONU_ID )
+    @classmethod
+    def setUpClass(cls):
+        cls.event = OnuActiveEvent(event_mgr, DEFAULT_ONU_DEVICE_ID, DEFAULT_PON_ID, DEFAULT_ONU_SN,
+                                   DEFAULT_ONU_REG, DEFAULT_OLT_SN, RAISED_TS, onu_id=DEFAULT_ONU_ID )
 
     def test_get_context_data(self):
 
@@ -94,9 +83,10 @@ class TestOnuActiveEvent(TestCase):
 
 class TestOnuDiscoveryEvent(TestCase):
 
-        def setUp(self):
-            self.event = OnuDiscoveryEvent(event_mgr, DEFAULT_PON_ID, DEFAULT_ONU_SN,
-                                               arrow.utcnow().timestamp)
+        @classmethod
+        def setUpClass(cls):
+            cls.event = OnuDiscoveryEvent(event_mgr, DEFAULT_PON_ID, DEFAULT_ONU_SN,
+                                              RAISED_TS)
         def test_get_context_data(self):
             expected_dict = {'pon-id': DEFAULT_PON_ID,
                              'serial-number': DEFAULT_ONU_SN,
@@ -104,282 +94,49 @@ class TestOnuDiscoveryEvent(TestCase):
 
             self.assertEqual(self.event.get_context_data(), expected_dict)
 
-class TestOnuDyingGaspEvent(TestCase):
-
-    def setUp(self):
-        self.event = OnuDyingGaspEvent(event_mgr, DEFAULT_ONU_ID, DEFAULT_PON_ID, DEFAULT_ONU_SN,
-                                           arrow.utcnow().timestamp)
-
-    def test_get_context_data(self):
-        expected_dict = {'onu-id': DEFAULT_ONU_ID,
-                         'onu-intf-id': DEFAULT_PON_ID,
-                         'onu-serial-number': DEFAULT_ONU_SN}
-
-        self.assertEqual(self.event.get_context_data(), expected_dict)
-
-class TestOnuEquipmentEvent(TestCase):
-
-    def setUp(self):
-        self.event = OnuEquipmentEvent(event_mgr, DEFAULT_ONU_ID, DEFAULT_PON_ID, DEFAULT_ONU_SN,
-                                           arrow.utcnow().timestamp)
-
-    def test_get_context_data(self):
-        expected_dict = {'onu-id': DEFAULT_ONU_ID,
-                         'onu-intf-id': DEFAULT_PON_ID,
-                         'onu-serial-number': DEFAULT_ONU_SN}
-
-        self.assertEqual(self.event.get_context_data(), expected_dict)
-
-class TestOnuHighRxOpticalEvent(TestCase):
-
-    def setUp(self):
-        self.event = OnuHighRxOpticalEvent(event_mgr, DEFAULT_ONU_ID, DEFAULT_PON_ID, DEFAULT_ONU_SN,
-                                           arrow.utcnow().timestamp)
-
-    def test_get_context_data(self):
-        expected_dict = {'onu-id': DEFAULT_ONU_ID,
-                         'onu-intf-id': DEFAULT_PON_ID,
-                         'onu-serial-number': DEFAULT_ONU_SN}
-
-        self.assertEqual(self.event.get_context_data(), expected_dict)
-
-class TestOnuHighTxOpticalEvent(TestCase):
-
-    def setUp(self):
-        self.event = OnuHighTxOpticalEvent(event_mgr, DEFAULT_ONU_ID, DEFAULT_PON_ID, DEFAULT_ONU_SN,
-                                           arrow.utcnow().timestamp)
-
-    def test_get_context_data(self):
-        expected_dict = {'onu-id': DEFAULT_ONU_ID,
-                         'onu-intf-id': DEFAULT_PON_ID,
-                         'onu-serial-number': DEFAULT_ONU_SN}
-
-        self.assertEqual(self.event.get_context_data(), expected_dict)
-
-class TestOnuLaserBiasEvent(TestCase):
-
-    def setUp(self):
-        self.event = OnuLaserBiasEvent(event_mgr, DEFAULT_ONU_ID, DEFAULT_PON_ID, DEFAULT_ONU_SN,
-                                           arrow.utcnow().timestamp)
-
-    def test_get_context_data(self):
-        expected_dict = {'onu-id': DEFAULT_ONU_ID,
-                         'onu-intf-id': DEFAULT_PON_ID,
-                         'onu-serial-number': DEFAULT_ONU_SN}
-
-        self.assertEqual(self.event.get_context_data(), expected_dict)
-
-class TestOnuLaserEolEvent(TestCase):
-
-    def setUp(self):
-        self.event = OnuLaserEolEvent(event_mgr, DEFAULT_ONU_ID, DEFAULT_PON_ID, DEFAULT_ONU_SN,
-                                       arrow.utcnow().timestamp)
-
-    def test_get_context_data(self):
-        expected_dict = {'onu-id': DEFAULT_ONU_ID,
-                         'onu-intf-id': DEFAULT_PON_ID,
-                         'onu-serial-number': DEFAULT_ONU_SN}
-
-        self.assertEqual(self.event.get_context_data(), expected_dict)
-
-class TestOnuLobEvent(TestCase):
-
-    def setUp(self):
-        self.event = OnuLobEvent(event_mgr, DEFAULT_ONU_ID, DEFAULT_PON_ID, DEFAULT_ONU_SN,
-                                       arrow.utcnow().timestamp)
-
-    def test_get_context_data(self):
-        expected_dict = {'onu-id': DEFAULT_ONU_ID,
-                         'onu-intf-id': DEFAULT_PON_ID,
-                         'onu-serial-number': DEFAULT_ONU_SN}
-
-        self.assertEqual(self.event.get_context_data(), expected_dict)
-
-class TestOnuLopcMicErrorEvent(TestCase):
-
-    def setUp(self):
-        self.event = OnuLopcMicErrorEvent(event_mgr, DEFAULT_ONU_ID, DEFAULT_PON_ID, DEFAULT_ONU_SN,
-                                       arrow.utcnow().timestamp)
-
-    def test_get_context_data(self):
-        expected_dict = {'onu-id': DEFAULT_ONU_ID,
-                         'onu-intf-id': DEFAULT_PON_ID,
-                         'onu-serial-number': DEFAULT_ONU_SN}
-
-        self.assertEqual(self.event.get_context_data(), expected_dict)
-
-class TestOnuLopcMissEvent(TestCase):
-
-    def setUp(self):
-        self.event = OnuLopcMissEvent(event_mgr, DEFAULT_ONU_ID, DEFAULT_PON_ID, DEFAULT_ONU_SN,
-                                       arrow.utcnow().timestamp)
-
-    def test_get_context_data(self):
-        expected_dict = {'onu-id': DEFAULT_ONU_ID,
-                         'onu-intf-id': DEFAULT_PON_ID,
-                         'onu-serial-number': DEFAULT_ONU_SN}
-
-        self.assertEqual(self.event.get_context_data(), expected_dict)
-
-class TestOnuLosEvent(TestCase):
-
-    def setUp(self):
-        self.event = OnuLosEvent(event_mgr, DEFAULT_ONU_ID, DEFAULT_PON_ID, DEFAULT_ONU_SN,
-                                       arrow.utcnow().timestamp)
-
-    def test_get_context_data(self):
-        expected_dict = {'onu-id': DEFAULT_ONU_ID,
-                         'onu-intf-id': DEFAULT_PON_ID,
-                         'onu-serial-number': DEFAULT_ONU_SN}
-
-        self.assertEqual(self.event.get_context_data(), expected_dict)
-
-class TestOnuLowRxOpticalEvent(TestCase):
-
-    def setUp(self):
-        self.event = OnuLowRxOpticalEvent(event_mgr, DEFAULT_ONU_ID, DEFAULT_PON_ID, DEFAULT_ONU_SN,
-                                       arrow.utcnow().timestamp)
 
-    def test_get_context_data(self):
-        expected_dict = {'onu-id': DEFAULT_ONU_ID,
-                         'onu-intf-id': DEFAULT_PON_ID,
-                         'onu-serial-number': DEFAULT_ONU_SN}
-
-        self.assertEqual(self.event.get_context_data(), expected_dict)
-
-class TestOnuLowTxOpticalEvent(TestCase):
-
-    def setUp(self):
-        self.event = OnuLowTxOpticalEvent(event_mgr, DEFAULT_ONU_ID, DEFAULT_PON_ID, DEFAULT_ONU_SN,
-                                       arrow.utcnow().timestamp)
-
-    def test_get_context_data(self):
-        expected_dict = {'onu-id': DEFAULT_ONU_ID,
-                         'onu-intf-id': DEFAULT_PON_ID,
-                         'onu-serial-number': DEFAULT_ONU_SN}
-
-        self.assertEqual(self.event.get_context_data(), expected_dict)
-
-class TestOnuSelfTestFailureEvent(TestCase):
-
-    def setUp(self):
-        self.event = OnuSelfTestFailureEvent(event_mgr, DEFAULT_ONU_ID, DEFAULT_PON_ID, DEFAULT_ONU_SN,
-                                       arrow.utcnow().timestamp)
-
-    def test_get_context_data(self):
-        expected_dict = {'onu-id': DEFAULT_ONU_ID,
-                         'onu-intf-id': DEFAULT_PON_ID,
-                         'onu-serial-number': DEFAULT_ONU_SN}
-
-        self.assertEqual(self.event.get_context_data(), expected_dict)
-
-class TestOnuSignalDegradeEvent(TestCase):
-
-    def setUp(self):
-        self.event = OnuSignalDegradeEvent(event_mgr, DEFAULT_ONU_ID, DEFAULT_PON_ID, 20, DEFAULT_ONU_SN,
-                                       arrow.utcnow().timestamp)
-
-    def test_get_context_data(self):
-        expected_dict = {'onu-id': DEFAULT_ONU_ID,
-                         'onu-intf-id': DEFAULT_PON_ID,
-                         'onu-serial-number': DEFAULT_ONU_SN,
-                         'inverse-bit-error-rate': 20}
-
-        self.assertEqual(self.event.get_context_data(), expected_dict)
-
-class TestOnuSignalFailEvent(TestCase):
-
-    def setUp(self):
-        self.event = OnuSignalFailEvent(event_mgr, DEFAULT_ONU_ID, DEFAULT_PON_ID, 20, DEFAULT_ONU_SN,
-                                       arrow.utcnow().timestamp)
-
-    def test_get_context_data(self):
-        expected_dict = {'onu-id': DEFAULT_ONU_ID,
-                         'onu-intf-id': DEFAULT_PON_ID,
-                         'onu-serial-number': DEFAULT_ONU_SN,
-                         'inverse-bit-error-rate': 20}
-
-        self.assertEqual(self.event.get_context_data(), expected_dict)
-
-class TestOnuStartupEvent(TestCase):
-
-    def setUp(self):
-        self.event = OnuStartupEvent(event_mgr, DEFAULT_ONU_ID, DEFAULT_PON_ID, DEFAULT_ONU_SN,
-                                       arrow.utcnow().timestamp)
-
-    def test_get_context_data(self):
-        expected_dict = {'onu-id': DEFAULT_ONU_ID,
-                         'onu-intf-id': DEFAULT_PON_ID,
-                         'onu-serial-number': DEFAULT_ONU_SN}
-
-        self.assertEqual(self.event.get_context_data(), expected_dict)
-
-class TestOnuTempRedEvent(TestCase):
-
-    def setUp(self):
-        self.event = OnuTempRedEvent(event_mgr, DEFAULT_ONU_ID, DEFAULT_PON_ID, DEFAULT_ONU_SN,
-                                       arrow.utcnow().timestamp)
-
-    def test_get_context_data(self):
-        expected_dict = {'onu-id': DEFAULT_ONU_ID,
-                         'onu-intf-id': DEFAULT_PON_ID,
-                         'onu-serial-number': DEFAULT_ONU_SN}
-
-        self.assertEqual(self.event.get_context_data(), expected_dict)
-
-class TestOnuTempYellowEvent(TestCase):
-
-    def setUp(self):
-        self.event = OnuTempYellowEvent(event_mgr, DEFAULT_ONU_ID, DEFAULT_PON_ID, DEFAULT_ONU_SN,
-                                       arrow.utcnow().timestamp)
-
-    def test_get_context_data(self):
-        expected_dict = {'onu-id': DEFAULT_ONU_ID,
-                         'onu-intf-id': DEFAULT_PON_ID,
-                         'onu-serial-number': DEFAULT_ONU_SN}
-
-        self.assertEqual(self.event.get_context_data(), expected_dict)
-
-class TestOnuVoltageRedEvent(TestCase):
-
-    def setUp(self):
-        self.event = OnuVoltageRedEvent(event_mgr, DEFAULT_ONU_ID, DEFAULT_PON_ID, DEFAULT_ONU_SN,
-                                       arrow.utcnow().timestamp)
-
-    def test_get_context_data(self):
-        expected_dict = {'onu-id': DEFAULT_ONU_ID,
-                         'onu-intf-id': DEFAULT_PON_ID,
-                         'onu-serial-number': DEFAULT_ONU_SN}
-
-        self.assertEqual(self.event.get_context_data(), expected_dict)
-
-class TestOnuVoltageYellowEvent(TestCase):
-
-    def setUp(self):
-        self.event = OnuVoltageYellowEvent(event_mgr, DEFAULT_ONU_ID, DEFAULT_PON_ID, DEFAULT_ONU_SN,
-                                           arrow.utcnow().timestamp)
-
-    def test_get_context_data(self):
-        expected_dict = {'onu-id': DEFAULT_ONU_ID,
-                         'onu-intf-id': DEFAULT_PON_ID,
-                         'onu-serial-number': DEFAULT_ONU_SN}
-
-        self.assertEqual(self.event.get_context_data(), expected_dict)
-
-class TestOnuWindowDriftEvent(TestCase):
-
-    def setUp(self):
-        self.event = OnuWindowDriftEvent(event_mgr, DEFAULT_ONU_ID, DEFAULT_PON_ID, 10, 20, DEFAULT_ONU_SN,
-                                           arrow.utcnow().timestamp)
-
-    def test_get_context_data(self):
-        expected_dict = {'onu-id': DEFAULT_ONU_ID,
-                         'onu-intf-id': DEFAULT_PON_ID,
-                         'onu-serial-number': DEFAULT_ONU_SN,
-                         'drift': 10,
-                         'new-eqd': 20}
-
-        self.assertEqual(self.event.get_context_data(), expected_dict)
+# ONU events whose context data identifies the ONU, as
+# (event class, arguments after the PON id, context data after the ONU ones)
+ONU_EVENT_CASES = [
+    (OnuActivationFailEvent, (), {}),
+    (OnuDyingGaspEvent, (), {}),
+    (OnuEquipmentEvent, (), {}),
+    (OnuHighRxOpticalEvent, (), {}),
+    (OnuHighTxOpticalEvent, (), {}),
+    (OnuLaserBiasEvent, (), {}),
+    (OnuLaserEolEvent, (), {}),
+    (OnuLobEvent, (), {}),
+    (OnuLopcMicErrorEvent, (), {}),
+    (OnuLopcMissEvent, (), {}),
+    (OnuLosEvent, (), {}),
+    (OnuLowRxOpticalEvent, (), {}),
+    (OnuLowTxOpticalEvent, (), {}),
+    (OnuSelfTestFailureEvent, (), {}),
+    (OnuSignalDegradeEvent, (20,), {'inverse-bit-error-rate': 20}),
+    (OnuSignalFailEvent, (20,), {'inverse-bit-error-rate': 20}),
+    (OnuStartupEvent, (), {}),
+    (OnuTempRedEvent, (), {}),
+    (OnuTempYellowEvent, (), {}),
+    (OnuVoltageRedEvent, (), {}),
+    (OnuVoltageYellowEvent, (), {}),
+    (OnuWindowDriftEvent, (10, 20), {'drift': 10, 'new-eqd': 20}),
+]
+
+
+class TestOnuEvents(TestCase):
+
+    def test_get_context_data(self):
+        onu_context = {'onu-id': DEFAULT_ONU_ID,
+                       'onu-intf-id': DEFAULT_PON_ID,
+                       'onu-serial-number': DEFAULT_ONU_SN}
+
+        for event_class, extra_args, extra_context in ONU_EVENT_CASES:
+            with self.subTest(event=event_class.__name__):
+                args = (event_mgr, DEFAULT_ONU_ID, DEFAULT_PON_ID) + extra_args + (DEFAULT_ONU_SN, RAISED_TS)
+                event = event_class(*args)
+                expected_dict = dict(onu_context, **extra_context)
+
+                self.assertEqual(event.get_context_data(), expected_dict)
 
 
 if __name__ == '__main__':
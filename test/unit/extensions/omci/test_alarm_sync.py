@@ -0,0 +1,132 @@
+#
+# Copyright 2020 the original author or authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from __future__ import absolute_import
+from unittest import TestCase, main
+from unittest.mock import patch, call, MagicMock
+from twisted.internet.task import Clock
+from pyvoltha.adapters.extensions.omci.database.alarm_db_ext import AlarmDbExternal
+from pyvoltha.adapters.extensions.omci.database.mib_db_api import ATTRIBUTES_KEY
+from pyvoltha.adapters.extensions.omci.state_machines import alarm_sync
+from pyvoltha.adapters.extensions.omci.state_machines.alarm_sync import AlarmSynchronizer
+
+DEVICE_ID = 'onu1'
+CLASS_ID = 11
+ENTITY_ID = 257
+BITMAP_KEY = AlarmDbExternal.ALARM_BITMAP_KEY
+
+
+def _bitmap(*alarm_numbers):
+    # Alarm number 0 is the most significant bit of the 224 bit alarm bitmap
+    return sum(1 << (223 - number) for number in alarm_numbers)
+
+
+def _alarm_db(bitmap):
+    return {CLASS_ID: {ENTITY_ID: {ATTRIBUTES_KEY: {BITMAP_KEY: bitmap}}}}
+
+
+class TestAlarmSynchronizerAudit(TestCase):
+    """
+    Test reconciling an alarm audit against the OLT alarm database snapshot
+    """
+
+    def setUp(self):
+        self.clock = Clock()
+        reactor_patch = patch.object(alarm_sync, 'reactor', self.clock)
+        reactor_patch.start()
+        self.addCleanup(reactor_patch.stop)
+
+        self.db = MagicMock()
+        self.sync = AlarmSynchronizer(MagicMock(), DEVICE_ID,
+                                      {'alarm-resync': MagicMock()}, self.db)
+        self.sync._device = MagicMock()
+        self.sync._alarm_manager = MagicMock()
+        self.sync.raise_alarm = MagicMock()
+        self.sync.clear_alarm = MagicMock()
+
+    def _reconcile(self, onu_only=None, olt_only=None, attr_diffs=None,
+                   onu_db=None, olt_db=None):
+        self.sync.reconcile_alarm_table({
+            'onu-only': onu_only,
+            'olt-only': olt_only,
+            'attr-diffs': attr_diffs,
+            'onu-db': onu_db or {},
+            'olt-db': olt_db or {},
+        })
+        self.clock.advance(0)
+
+    def _alarms(self, method):
+        return [args[2] for args, _ in method.call_args_list]
+
+    def test_attr_diff_uses_snapshot_bitmap(self):
+        self._reconcile(attr_diffs=[(CLASS_ID, ENTITY_ID, BITMAP_KEY)],
+                        onu_db=_alarm_db(_bitmap(1, 2)),
+                        olt_db=_alarm_db(_bitmap(0, 1)))
+
+        self.db.query.assert_not_called()
+        self.db.set.assert_called_once_with(DEVICE_ID, CLASS_ID, ENTITY_ID,
+                                            {BITMAP_KEY: _bitmap(1, 2)})
+        self.assertEqual(self._alarms(self.sync.clear_alarm), [0])
+        self.assertEqual(self._alarms(self.sync.raise_alarm), [2])
+
+    def test_attr_diff_matching_snapshot_is_skipped(self):
+        self._reconcile(attr_diffs=[(CLASS_ID, ENTITY_ID, BITMAP_KEY)],
+                        onu_db=_alarm_db(_bitmap(3)),
+                        olt_db=_alarm_db(_bitmap(3)))
+
+        self.db.set.assert_not_called()
+        self.sync.clear_alarm.assert_not_called()
+        self.sync.raise_alarm.assert_not_called()
+
+    def test_onu_only_raises_from_clear(self):
+        self._reconcile(onu_only=[(CLASS_ID, ENTITY_ID)],
+                        onu_db=_alarm_db(_bitmap(4, 208)))
+
+        self.db.query.assert_not_called()
+        self.sync.clear_alarm.assert_not_called()
+        self.assertEqual(self._alarms(self.sync.raise_alarm), [4, 208])
+
+    def test_olt_only_clears_snapshot_alarms_and_deletes(self):
+        self._reconcile(olt_only=[(CLASS_ID, ENTITY_ID)],
+                        olt_db=_alarm_db(_bitmap(5)))
+
+        self.db.query.assert_not_called()
+        self.db.delete.assert_called_once_with(DEVICE_ID, CLASS_ID, ENTITY_ID)
+        self.assertEqual(self._alarms(self.sync.clear_alarm), [5])
+        self.sync.raise_alarm.assert_not_called()
+
+    def test_olt_only_missing_from_snapshot_queries_database(self):
+        self.db.query.return_value = {ATTRIBUTES_KEY: {BITMAP_KEY: _bitmap(6)}}
+
+        self._reconcile(olt_only=[(CLASS_ID, ENTITY_ID)])
+
+        self.db.query.assert_called_once_with(DEVICE_ID, CLASS_ID, ENTITY_ID)
+        self.assertEqual(self.db.mock_calls[-1], call.delete(DEVICE_ID, CLASS_ID, ENTITY_ID))
+        self.assertEqual(self._alarms(self.sync.clear_alarm), [6])
+        self.sync.raise_alarm.assert_not_called()
+
+    def test_missing_onu_entry_is_ignored(self):
+        self._reconcile(onu_only=[(CLASS_ID, ENTITY_ID)],
+                        attr_diffs=[(CLASS_ID, ENTITY_ID, BITMAP_KEY)],
+                        olt_db=_alarm_db(_bitmap(7)))
+
+        self.db.set.assert_not_called()
+        self.sync.clear_alarm.assert_not_called()
+        self.sync.raise_alarm.assert_not_called()
+
+
+if __name__ == '__main__':
+    main()
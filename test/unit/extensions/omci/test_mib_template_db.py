@@ -0,0 +1,106 @@
+#
+# Copyright 2020 the original author or authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from __future__ import absolute_import
+from collections import OrderedDict
+from unittest import TestCase, main
+from unittest.mock import patch, MagicMock
+from twisted.internet.defer import succeed
+from pyvoltha.adapters.extensions.omci.database import mib_template_db
+from pyvoltha.adapters.extensions.omci.database.mib_template_db import MibTemplateDb
+
+TEMPLATE = b'{"2": {"0": {"attributes": {"sn": "%SERIAL_NUMBER%"}}}}'
+
+
+class TestMibTemplateDb(TestCase):
+    """
+    Test the template cache shared by the MIB template databases
+    """
+
+    def setUp(self):
+        self.now = 1000.0
+        self.store = MagicMock()
+        self.store.get.side_effect = lambda path: succeed(TEMPLATE)
+
+        patches = [
+            patch.object(MibTemplateDb, '_template_cache', OrderedDict()),
+            patch.object(mib_template_db, 'registry', MagicMock()),
+            patch.object(mib_template_db, 'TwistedEtcdStore', return_value=self.store),
+            patch.object(mib_template_db, 'time'),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        mib_template_db.time.time.side_effect = lambda: self.now
+        mib_template_db.registry.return_value.get_args.return_value.etcd = 'etcd:2379'
+
+    def _load(self, equipment_id='equipment'):
+        db = MibTemplateDb('vendor', equipment_id, 'version', 'ABCD00000001', '00:00:00:00:00:01')
+        results = []
+        db.load_template().addCallback(results.append)
+        return db, results[0]
+
+    def test_miss_reads_store(self):
+        db, found = self._load()
+
+        self.assertTrue(found)
+        self.assertTrue(db.loaded)
+        self.store.get.assert_called_once_with('vendor/equipment/version')
+        self.assertEqual(db.get_template_instance()[2][0]['attributes']['sn'], 'ABCD00000001')
+
+    def test_hit_skips_store(self):
+        self._load()
+        self.store.get.reset_mock()
+        mib_template_db.TwistedEtcdStore.reset_mock()
+
+        db, found = self._load()
+
+        self.assertTrue(found)
+        self.assertTrue(db.loaded)
+        self.store.get.assert_not_called()
+        mib_template_db.TwistedEtcdStore.assert_not_called()
+
+    def test_expired_entry_reads_store(self):
+        self._load()
+        self.store.get.reset_mock()
+
+        self.now += MibTemplateDb.TEMPLATE_CACHE_TTL
+        self._load()
+
+        self.store.get.assert_called_once_with('vendor/equipment/version')
+
+    def test_missing_template_is_not_cached(self):
+        self.store.get.side_effect = lambda path: succeed(None)
+
+        db, found = self._load()
+
+        self.assertFalse(found)
+        self.assertFalse(db.loaded)
+        self.assertEqual(len(MibTemplateDb._template_cache), 0)
+
+    def test_least_recent_template_is_evicted(self):
+        with patch.object(MibTemplateDb, 'TEMPLATE_CACHE_SIZE', 2):
+            self._load('e1')
+            self._load('e2')
+            self._load('e1')
+            self._load('e3')
+
+        self.assertEqual(list(MibTemplateDb._template_cache),
+                         ['vendor/e1/version', 'vendor/e3/version'])
+
+
+if __name__ == '__main__':
+    main()
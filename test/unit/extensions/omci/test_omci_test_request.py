@@ -0,0 +1,104 @@
+#
+# Copyright 2020 the original author or authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from __future__ import absolute_import
+from unittest import TestCase, main
+from unittest.mock import patch
+from twisted.internet.defer import Deferred
+from twisted.internet.task import Clock
+from pyvoltha.adapters.extensions.omci.tasks import omci_test_request
+from pyvoltha.adapters.extensions.omci.tasks.omci_test_request import OmciTestCollector
+
+INTERVAL = 60
+
+
+class TestOmciTestCollector(TestCase):
+    """
+    Test the collector shared by the OMCI test requests of an interval
+    """
+
+    def setUp(self):
+        self.clock = Clock()
+        reactor_patch = patch.object(omci_test_request, 'reactor', self.clock)
+        reactor_patch.start()
+        self.addCleanup(reactor_patch.stop)
+
+        self.collector = OmciTestCollector(INTERVAL)
+        self.collector._lc.clock = self.clock
+        self.calls = []
+
+    def tearDown(self):
+        if self.collector._lc.running:
+            self.collector._lc.stop()
+
+    def _callback(self, name, result=None):
+        def callback():
+            self.calls.append(name)
+            return result
+        return callback
+
+    def test_get_collector_is_shared_per_interval(self):
+        with patch.object(OmciTestCollector, '_collectors', dict()):
+            collector = OmciTestCollector.get_collector(INTERVAL)
+            self.assertIs(OmciTestCollector.get_collector(INTERVAL), collector)
+            self.assertIsNot(OmciTestCollector.get_collector(INTERVAL * 2), collector)
+            self.assertEqual(collector.interval, INTERVAL)
+
+    def test_register_calls_at_once_and_starts_loop(self):
+        self.collector.register('onu1', self._callback('onu1'))
+
+        self.assertEqual(self.calls, ['onu1'])
+        self.assertTrue(self.collector._lc.running)
+
+    def test_tick_spreads_callbacks_over_interval(self):
+        self.collector.register('onu1', self._callback('onu1'))
+        self.collector.register('onu2', self._callback('onu2'))
+        del self.calls[:]
+
+        self.clock.advance(INTERVAL)
+        self.assertEqual(self.calls, ['onu1'])
+
+        self.clock.advance(INTERVAL / 2)
+        self.assertEqual(self.calls, ['onu1', 'onu2'])
+
+    def test_unregister_stops_callbacks_and_loop(self):
+        self.collector.register('onu1', self._callback('onu1'))
+        self.collector.register('onu2', self._callback('onu2'))
+        del self.calls[:]
+
+        self.collector.unregister('onu1')
+        self.clock.advance(INTERVAL)
+        self.clock.advance(INTERVAL / 2)
+        self.assertEqual(self.calls, ['onu2'])
+        self.assertTrue(self.collector._lc.running)
+
+        self.collector.unregister('onu2')
+        self.assertFalse(self.collector._lc.running)
+
+    def test_tick_skips_outstanding_collection(self):
+        d = Deferred()
+        self.collector.register('onu1', self._callback('onu1', d))
+
+        self.clock.advance(INTERVAL)
+        self.assertEqual(self.calls, ['onu1'])
+
+        d.callback(None)
+        self.clock.advance(INTERVAL)
+        self.assertEqual(self.calls, ['onu1', 'onu1'])
+
+
+if __name__ == '__main__':
+    main()
@@ -11,13 +11,19 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import importlib
+import logging
 import os
 import sys
 from unittest import TestCase, main
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
 from twisted.internet import defer
+from twisted.internet.task import Clock
 from voltha_protos.adapter_pb2 import Adapter
 from voltha_protos.device_pb2 import DeviceType
+from voltha_protos.events_pb2 import Event
+from voltha_protos.common_pb2 import OperStatus
+from voltha_protos.inter_container_pb2 import IntType, StrType, BoolType
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), "../../../")))
 
@@ -27,8 +33,33 @@ def mock_decorator(f):
     return real_wrapper
 
 
-patch('pyvoltha.adapters.kafka.container_proxy.ContainerProxy.wrap_request', mock_decorator).start()
-from pyvoltha.adapters.kafka.core_proxy import CoreProxy
+import pyvoltha.adapters.kafka as kafka_package
+from pyvoltha.adapters.kafka.container_proxy import ContainerProxy
+
+CORE_PROXY_MODULE = 'pyvoltha.adapters.kafka.core_proxy'
+core_proxy = None
+CoreProxy = None
+_saved_core_proxy = None
+
+
+def setUpModule():
+    # core_proxy applies wrap_request when it is imported, so import a copy
+    # of it while the decorator is patched out, and keep that copy to this
+    # module's tests
+    global core_proxy, CoreProxy, _saved_core_proxy
+    _saved_core_proxy = sys.modules.pop(CORE_PROXY_MODULE, None)
+    with patch.object(ContainerProxy, 'wrap_request', staticmethod(mock_decorator)):
+        core_proxy = importlib.import_module(CORE_PROXY_MODULE)
+    CoreProxy = core_proxy.CoreProxy
+
+
+def tearDownModule():
+    if _saved_core_proxy is None:
+        sys.modules.pop(CORE_PROXY_MODULE, None)
+        del kafka_package.core_proxy
+    else:
+        sys.modules[CORE_PROXY_MODULE] = _saved_core_proxy
+        kafka_package.core_proxy = _saved_core_proxy
 
 
 class TestCoreProxy(TestCase):
@@ -145,6 +176,119 @@ class TestCoreProxy(TestCase):
 
         self.assertEqual(str(e.exception), "currentReplica can't be 0, it has to start from 1")
 
+    def test_get_device_entry(self):
+        entry = self.core_proxy._get_device_entry('dev1')
+        self.assertEqual((entry.to_topic, entry.reply_topic), ('test_core', 'test_openonu'))
+        self.assertEqual(entry.id_proto.id, 'dev1')
+        self.assertIs(self.core_proxy._get_device_entry('dev1'), entry)
+
+        self.core_proxy.update_device_core_reference('dev1', 'other_core')
+        entry = self.core_proxy._get_device_entry('dev1')
+        self.assertEqual((entry.to_topic, entry.reply_topic), ('other_core', 'test_openonu'))
+        self.assertEqual(entry.id_proto.id, 'dev1')
+        entry = self.core_proxy._get_device_entry('dev2')
+        self.assertEqual((entry.to_topic, entry.reply_topic), ('test_core', 'test_openonu'))
+        self.assertEqual(self.core_proxy.get_core_topic('dev1'), 'other_core')
+        self.assertEqual(self.core_proxy.get_core_topic('dev2'), 'test_core')
+
+        self.core_proxy.delete_device_core_reference('dev1', 'other_core')
+        entry = self.core_proxy._get_device_entry('dev1')
+        self.assertEqual((entry.to_topic, entry.reply_topic), ('test_core', 'test_openonu'))
+        self.assertEqual(self.core_proxy.get_core_topic('dev1'), 'test_core')
+        self.assertRaises(KeyError, self.core_proxy.delete_device_core_reference,
+                          'dev2', 'test_core')
+
+    def test_delete_unknown_device_core_reference(self):
+        entry = self.core_proxy._get_device_entry('dev1')
+        self.assertRaises(KeyError, self.core_proxy.delete_device_core_reference,
+                          'dev1', 'test_core')
+        self.assertIs(self.core_proxy._get_device_entry('dev1'), entry)
+
+    def test_get_device_entry_evicts_least_recent(self):
+        with patch('pyvoltha.adapters.kafka.core_proxy._DEVICE_CACHE_SIZE', 2):
+            dev1 = self.core_proxy._get_device_entry('dev1')
+            self.core_proxy._get_device_entry('dev2')
+            self.assertIs(self.core_proxy._get_device_entry('dev1'), dev1)
+            self.core_proxy._get_device_entry('dev3')
+
+            self.assertEqual(list(self.core_proxy._default_devices), ['dev1', 'dev3'])
+            self.core_proxy.update_device_core_reference('dev1', 'other_core')
+            self.assertEqual(list(self.core_proxy._default_devices), ['dev3'])
+            self.assertEqual(self.core_proxy._get_device_entry('dev1').to_topic,
+                             'other_core')
+
+    def test_submit_event_batches(self):
+        clock = Clock()
+        self.core_proxy.kafka_proxy = MagicMock()
+        send = self.core_proxy.kafka_proxy._send_kafka_message
+
+        with patch('pyvoltha.adapters.kafka.core_proxy.reactor', clock):
+            self.core_proxy.submit_event(Event())
+            self.core_proxy.submit_event(Event())
+            self.assertEqual(send.call_count, 0)
+
+            clock.advance(self.core_proxy.EVENT_FLUSH_DELAY)
+            self.assertEqual(send.call_count, 2)
+            send.assert_called_with('test.events', Event())
+
+            self.core_proxy.submit_event(Event())
+            self.core_proxy.submit_event(Event(), immediate=True)
+            self.assertEqual(send.call_count, 4)
+            self.assertEqual(clock.getDelayedCalls(), [])
+
+            for _ in range(self.core_proxy.EVENT_BATCH_SIZE):
+                self.core_proxy.submit_event(Event())
+            self.assertEqual(send.call_count, 4 + self.core_proxy.EVENT_BATCH_SIZE)
+
+    @defer.inlineCallbacks
+    def test_device_state_update_unset_status(self):
+        with patch.object(self.core_proxy, "invoke") as mock_invoke:
+            mock_invoke.return_value = "success"
+
+            yield self.core_proxy.device_state_update('dev1', oper_status=OperStatus.UNKNOWN)
+            kwargs = mock_invoke.call_args[1]
+            self.assertEqual(kwargs['oper_status'], IntType(val=OperStatus.UNKNOWN))
+            self.assertEqual(kwargs['connect_status'], IntType(val=-1))
+
+    def test_debug_follows_module_logger_level(self):
+        module_logger = logging.getLogger(CORE_PROXY_MODULE)
+        self.addCleanup(module_logger.setLevel, module_logger.level)
+
+        with patch.object(core_proxy, 'log') as log:
+            module_logger.setLevel(logging.DEBUG)
+            self.core_proxy.update_device_core_reference('dev1', 'other_core')
+            self.assertEqual(log.debug.call_count, 1)
+
+            module_logger.setLevel(logging.INFO)
+            self.core_proxy.update_device_core_reference('dev1', 'other_core')
+            self.assertEqual(log.debug.call_count, 1)
+
+    def test_scalar_wrappers(self):
+        self.assertEqual(core_proxy._int(1), IntType(val=1))
+        self.assertIs(core_proxy._int(1), core_proxy._int(1))
+        self.assertIsNot(core_proxy._int(True), core_proxy._int(1))
+        self.assertIsNot(core_proxy._int(False), core_proxy._int(0))
+
+        with patch.object(core_proxy, '_WRAPPER_CACHE_SIZE', 2), \
+                patch.object(core_proxy, '_str_types', core_proxy.OrderedDict()):
+            first = core_proxy._str('a')
+            core_proxy._str('b')
+            self.assertIs(core_proxy._str('a'), first)
+            core_proxy._str('c')
+            self.assertEqual([key[1] for key in core_proxy._str_types], ['a', 'c'])
+
+    def test_to_proto(self):
+        device_type = DeviceType(id="brmc_openonu")
+        encoded = self.core_proxy._to_proto(onu_id=3, serial_number='BBSM00000001',
+                                            flag=True, device_type=device_type,
+                                            ignored=1.5)
+        self.assertEqual(encoded, {
+            'onu_id': IntType(val=3),
+            'serial_number': StrType(val='BBSM00000001'),
+            'flag': BoolType(val=True),
+            'device_type': device_type,
+        })
+
 
 if __name__ == '__main__':
     main()
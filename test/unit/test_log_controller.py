@@ -0,0 +1,90 @@
+#
+# Copyright 2020 the original author or authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+from __future__ import absolute_import
+from unittest import TestCase, main
+from unittest.mock import patch, MagicMock
+
+from twisted.internet.defer import succeed
+from twisted.internet.task import Clock
+
+from pyvoltha.adapters import log_controller
+from pyvoltha.adapters.log_controller import LogController
+
+
+class _ThreadlessClock(Clock):
+    """ Clock that runs callFromThread calls at once """
+    def callFromThread(self, f, *args, **kwargs):
+        f(*args, **kwargs)
+
+
+class TestLogController(TestCase):
+
+    def setUp(self):
+        self.clock = _ThreadlessClock()
+        self.levels = {}
+
+        patches = [
+            patch.object(log_controller, 'reactor', self.clock),
+            patch.object(log_controller, 'TwistedEtcdStore', MagicMock()),
+            patch.object(log_controller, 'update_logging'),
+            patch.object(LogController, 'active_log_level', None),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.update_logging = log_controller.update_logging
+
+        self.controller = LogController('localhost', 2379)
+        self.controller.log = MagicMock()
+        self.controller.global_config_path = self.controller.make_config_path('global')
+        self.controller.component_config_path = self.controller.make_config_path('adapter')
+        self.controller.etcd_client.get.side_effect = \
+            lambda path: succeed(self.levels.get(path))
+
+    def _set_component_level(self, level):
+        self.levels[self.controller.component_config_path] = level
+
+    def test_burst_of_updates_applies_last_value(self):
+        self._set_component_level(b'INFO')
+        self.controller.watch_callback(None)
+        self._set_component_level(b'DEBUG')
+        self.controller.watch_callback(None)
+        self.assertEqual(len(self.clock.getDelayedCalls()), 1)
+        self.update_logging.assert_not_called()
+
+        self.clock.advance(LogController.CONFIG_CHANGE_DELAY)
+
+        self.assertEqual(self.update_logging.call_count, 1)
+        self.assertEqual(self.update_logging.call_args[1]['verbosity_adjust'], 10)
+        self.assertEqual(self.clock.getDelayedCalls(), [])
+
+    def test_repeated_value_is_ignored(self):
+        self._set_component_level(b'ERROR')
+        self.controller.watch_callback(None)
+        self.clock.advance(LogController.CONFIG_CHANGE_DELAY)
+        self.assertEqual(self.update_logging.call_count, 1)
+
+        with patch.object(self.controller, '_component_loglevel') as decode:
+            self.controller.watch_callback(None)
+            self.clock.advance(LogController.CONFIG_CHANGE_DELAY)
+            decode.assert_not_called()
+
+        self.assertEqual(self.update_logging.call_count, 1)
+        self.assertEqual(self.update_logging.call_args[1]['verbosity_adjust'], 40)
+
+
+if __name__ == '__main__':
+    main()